@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import aiohttp
+from rate_limiter import AsyncTokenBucket, RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+class AsyncMarginEdgeClient:
+    """asyncio counterpart to MarginEdgeClient.
+
+    Same get_* surface, but every method is a coroutine and all of them share one
+    aiohttp session and one AsyncTokenBucket, so a single event loop can keep many
+    requests in flight without going over the API quota:
+
+        async with AsyncMarginEdgeClient(api_key) as client:
+            products, orders = await asyncio.gather(
+                client.get_products(unit_id),
+                client.get_orders(unit_id, start, end),
+            )
+    """
+
+    def __init__(self, api_key, max_connections=20, connect_timeout=5, read_timeout=30,
+                 requests_per_second=5, burst=10, max_retries=5, rate_limiter=None, retry_policy=None):
+        self.base_url = "https://api.marginedge.com/public"
+        self.headers = {
+            "x-api-key": api_key,
+            "Content-Type": "application/json",
+            "Accept": "application/json"
+        }
+        self.max_connections = max_connections
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.rate_limiter = rate_limiter or AsyncTokenBucket(requests_per_second, burst)
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=max_retries)
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        # Created lazily so the session binds to the loop that actually uses it
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections)
+            self._session = aiohttp.ClientSession(
+                headers=self.headers, connector=connector, timeout=self.timeout
+            )
+        return self._session
+
+    async def _make_request(self, endpoint, params=None):
+        url = f"{self.base_url}/{endpoint}"
+        # aiohttp only accepts str/int/float query values
+        query = {key: str(value) for key, value in (params or {}).items() if value is not None}
+        session = self._get_session()
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire()
+            async with session.get(url, params=query) as response:
+                if response.status == 429 and attempt < self.retry_policy.max_retries:
+                    delay = self.retry_policy.delay(attempt, response.headers.get("Retry-After"))
+                    logger.warning("429 from %s, retrying in %.2fs (attempt %d/%d)",
+                                   endpoint, delay, attempt + 1, self.retry_policy.max_retries)
+                    self.rate_limiter.pause(delay)
+                    attempt += 1
+                    continue
+                response.raise_for_status()
+                return await response.json(content_type=None)
+
+    async def _iter_records(self, endpoint, params=None):
+        """Async generator over every record of a paginated endpoint"""
+        params = dict(params or {})
+        while True:
+            data = await self._make_request(endpoint, params)
+            for key in data.keys():
+                if isinstance(data[key], list):
+                    for record in data[key]:
+                        yield record
+                    break
+
+            next_page = data.get('nextPage')
+            if not next_page:
+                break
+            params['nextPage'] = next_page
+
+    async def _get_all_pages(self, endpoint, params=None):
+        return [record async for record in self._iter_records(endpoint, params)]
+
+    async def get_restaurant_units(self):
+        return await self._get_all_pages("restaurantUnits")
+
+    async def get_categories(self, restaurant_unit_id):
+        return await self._get_all_pages("categories", {"restaurantUnitId": restaurant_unit_id})
+
+    async def get_products(self, restaurant_unit_id, category=None, search_term=None):
+        params = {"restaurantUnitId": restaurant_unit_id}
+        if category:
+            params["category"] = category
+        if search_term:
+            params["search"] = search_term
+        return await self._get_all_pages("products", params)
+
+    async def get_vendors(self, restaurant_unit_id):
+        return await self._get_all_pages("vendors", {"restaurantUnitId": restaurant_unit_id})
+
+    async def get_orders(self, restaurant_unit_id, start_date, end_date, order_status=None):
+        params = {
+            "restaurantUnitId": restaurant_unit_id,
+            "startDate": start_date,
+            "endDate": end_date
+        }
+        if order_status:
+            params["orderStatus"] = order_status
+        return await self._get_all_pages("orders", params)
+
+    async def get_order_detail(self, restaurant_unit_id, order_id):
+        return await self._make_request(f"orders/{order_id}", {"restaurantUnitId": restaurant_unit_id})
+
+    async def get_order_details(self, restaurant_unit_id, order_ids, max_concurrency=None, return_exceptions=False):
+        """Async generator yielding (order_id, detail) as each order detail completes"""
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_connections)
+
+        async def fetch(order_id):
+            async with semaphore:
+                try:
+                    return order_id, await self.get_order_detail(restaurant_unit_id, order_id)
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    return order_id, e
+
+        tasks = [asyncio.ensure_future(fetch(order_id)) for order_id in order_ids]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def get_product_details(self, restaurant_unit_id, product_id):
+        return await self._make_request(f"products/{product_id}", {"restaurantUnitId": restaurant_unit_id})
+
+    async def get_product_price_history(self, restaurant_unit_id, product_id, start_date, end_date):
+        params = {
+            "restaurantUnitId": restaurant_unit_id,
+            "startDate": start_date,
+            "endDate": end_date
+        }
+        return await self._make_request(f"products/{product_id}/priceHistory", params)
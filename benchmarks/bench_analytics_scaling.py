@@ -0,0 +1,87 @@
+"""Times every offline analysis function across snapshot sizes and fits its growth rate.
+
+Run from the repo root:  python benchmarks/bench_analytics_scaling.py [--max-line-items 250000]
+Each size is a generated restaurant_data.json (benchmarks/generate_snapshot.py)
+with products growing alongside line items. Every call starts cold, so the
+timings include loading the snapshot from disk, as the scripts do. Anything
+growing faster than n^1.3 is flagged.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_product_price_changes import fitted_exponent
+from fake_marginedge import generate_snapshot
+import snapshot_loader
+
+# (line items, products); 50 vendors throughout
+SIZES = [(10_000, 500), (50_000, 1_000), (250_000, 5_000), (1_000_000, 10_000)]
+N_VENDORS = 50
+SUPERLINEAR = 1.3
+
+def functions():
+    import vendor_analysis
+    import product_analysis
+    # Creates its client, order cache and journal in the working directory
+    import explore_marginedge_data
+
+    return [
+        ("vendor_analysis.get_top_vendors_by_spend", lambda path: vendor_analysis.get_top_vendors_by_spend(file_path=path)),
+        ("vendor_analysis.get_vendor_purchases", lambda path: vendor_analysis.get_vendor_purchases("Vendor 0", file_path=path)),
+        ("product_analysis.get_product_price_changes", lambda path: product_analysis.get_product_price_changes(days=5, file_path=path)),
+        ("product_analysis.get_product_sales", lambda path: product_analysis.get_product_sales("Chicken", days=7, file_path=path)),
+        ("explore_marginedge_data.load_data", lambda path: explore_marginedge_data.load_data()),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-line-items", type=int, default=SIZES[-1][0])
+    args = parser.parse_args()
+    sizes = [(items, products) for items, products in SIZES if items <= args.max_line_items]
+    if len(sizes) < 2:
+        parser.error("need at least two sizes to fit a growth rate")
+
+    cwd = os.getcwd()
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            # explore_marginedge_data always reads restaurant_data.json from the working directory
+            path = os.path.join(tmp, "restaurant_data.json")
+            benchmarks = functions()
+            for n_line_items, n_products in sizes:
+                data = generate_snapshot(n_products=n_products, n_vendors=N_VENDORS, n_line_items=n_line_items)
+                with open(path, 'w') as f:
+                    json.dump(data, f, indent=2)
+                del data
+                print(f"\n{n_line_items:,} line items, {n_products:,} products ({os.path.getsize(path) / 1e6:.0f} MB)")
+                for name, fn in benchmarks:
+                    snapshot_loader.invalidate()
+                    start = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        fn(path)
+                    elapsed = time.perf_counter() - start
+                    timings.setdefault(name, []).append(elapsed)
+                    print(f"  {name:<45} {elapsed:>8.3f}s")
+        finally:
+            snapshot_loader.invalidate()
+            os.chdir(cwd)
+
+    counts = [n for n, _ in sizes]
+    print(f"\n{'function':<45} {'growth':>8}")
+    for name, times in timings.items():
+        exponent = fitted_exponent(counts, times)
+        flag = "  <-- superlinear" if exponent > SUPERLINEAR else ""
+        print(f"{name:<45} {'n^%.2f' % exponent:>8}{flag}")
+
+if __name__ == "__main__":
+    main()
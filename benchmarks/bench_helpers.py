@@ -0,0 +1,153 @@
+"""Request count, wall time and peak memory of every helper and analysis function.
+
+Run from the repo root:  python benchmarks/bench_helpers.py [--save out.json] [--compare out.json]
+Everything runs against benchmarks/fake_marginedge.py (with latency and injected
+429s), each function on a fresh client so caches start cold. --compare flags any
+function whose request count grew or whose time or memory grew by more than 25%
+against a saved run.
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_marginedge import FakeMarginEdgeServer, generate_dataset
+from marginedge_client import MarginEdgeClient
+import helpers
+import snapshot_loader
+
+N_PRODUCTS = 400
+N_ORDERS = 600
+LATENCY = 0.005
+THROTTLE_RATE = 0.02
+TOLERANCE = 1.25
+
+def make_client(server):
+    client = MarginEdgeClient("fake", requests_per_second=500, burst=100)
+    client.base_url = server.base_url
+    return client
+
+def measure(server, fn):
+    """(result, stats) for fn(), counting only the requests fn itself makes"""
+    helpers._product_indexes.clear()
+    snapshot_loader.invalidate()
+    server.reset_stats()
+    tracemalloc.start()
+    start = time.perf_counter()
+    # Analysis scripts print as they go; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = server.stats()
+    return result, {
+        "requests": stats["requests"],
+        "throttled": stats["throttled"],
+        "kb_received": round(stats["bytes"] / 1024, 1),
+        "seconds": round(elapsed, 4),
+        "peak_mb": round(peak / 1e6, 2),
+        "by_endpoint": stats["by_endpoint"]
+    }
+
+def benchmarks(server, unit, dataset, snapshot_path):
+    chicken = next(p["productName"] for p in dataset[unit]["products"] if "Chicken" in p["productName"])
+    vendor = dataset[unit]["vendors"][0]["vendorName"]
+    cases = [
+        ("helpers.search_products", lambda c: helpers.search_products(c, unit, "chicken")),
+        ("helpers.get_product_details", lambda c: helpers.get_product_details(c, unit, chicken)),
+        ("helpers.get_product_price_history", lambda c: helpers.get_product_price_history(c, unit, chicken)),
+        ("helpers.get_vendor_purchases", lambda c: helpers.get_vendor_purchases(c, unit, chicken)),
+        ("helpers.get_top_vendors_by_spend", lambda c: helpers.get_top_vendors_by_spend(c, unit)),
+        ("helpers.get_product_price_changes", lambda c: helpers.get_product_price_changes(c, unit, 5)),
+        ("helpers.analyze_price_trends", lambda c: helpers.analyze_price_trends(c, unit, chicken)),
+        ("helpers.evaluate_vendor_performance", lambda c: helpers.evaluate_vendor_performance(c, unit, vendor)),
+    ]
+    for name, call in cases:
+        client = make_client(server)
+        yield name, lambda call=call, client=client: call(client)
+
+    import chicken_analysis
+    import product_analysis
+    import vendor_analysis
+
+    def chicken_report():
+        client = make_client(server)
+        chicken_analysis.marginedge_client = client
+        chicken_analysis.restaurant_unit_id = unit
+        chicken_analysis.main()
+
+    yield "chicken_analysis.main", chicken_report
+    yield "vendor_analysis.get_top_vendors_by_spend", lambda: vendor_analysis.get_top_vendors_by_spend(file_path=snapshot_path)
+    yield "vendor_analysis.get_vendor_purchases", lambda: vendor_analysis.get_vendor_purchases(vendor, file_path=snapshot_path)
+    yield "product_analysis.get_product_price_changes", lambda: product_analysis.get_product_price_changes(file_path=snapshot_path)
+    yield "product_analysis.get_product_sales", lambda: product_analysis.get_product_sales("Chicken", file_path=snapshot_path)
+
+def compare(results, baseline):
+    regressions = []
+    for name, stats in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if stats["requests"] > old["requests"]:
+            regressions.append(f"{name}: requests {old['requests']} -> {stats['requests']}")
+        for key in ("seconds", "peak_mb"):
+            if old[key] and stats[key] > old[key] * TOLERANCE:
+                regressions.append(f"{name}: {key} {old[key]} -> {stats[key]}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="flag regressions against a saved JSON file")
+    args = parser.parse_args()
+    # The injected 429s are expected; don't log every retry
+    logging.getLogger("marginedge_client").setLevel(logging.ERROR)
+
+    dataset = generate_dataset(n_products=N_PRODUCTS, n_orders=N_ORDERS, price_drift=0.01)
+    unit = dataset["units"][0]["restaurantUnitId"]
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, \
+            FakeMarginEdgeServer(dataset, latency=LATENCY, throttle_rate=THROTTLE_RATE) as server:
+        # chicken_analysis creates its order cache in the working directory on import
+        os.chdir(tmp)
+        try:
+            snapshot_path = os.path.join(tmp, "restaurant_data.json")
+            with open(snapshot_path, 'w') as f:
+                json.dump(make_client(server).get_all_data(unit), f)
+
+            print(f"{'function':<45} {'requests':>8} {'429s':>5} {'KB in':>8} {'seconds':>8} {'peak MB':>8}")
+            for name, fn in benchmarks(server, unit, dataset, snapshot_path):
+                _, stats = measure(server, fn)
+                results[name] = stats
+                print(f"{name:<45} {stats['requests']:>8} {stats['throttled']:>5} {stats['kb_received']:>8} "
+                      f"{stats['seconds']:>8.3f} {stats['peak_mb']:>8.2f}")
+        finally:
+            os.chdir(cwd)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.save}")
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            regressions = compare(results, json.load(f))
+        print("\nRegressions:" if regressions else "\nNo regressions against " + args.compare)
+        for line in regressions:
+            print(f"  {line}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
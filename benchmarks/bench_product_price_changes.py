@@ -0,0 +1,46 @@
+"""Times product_analysis.get_product_price_changes as line-item count grows.
+
+Run from the repo root:  python benchmarks/bench_product_price_changes.py
+The fitted exponent should stay close to 1.0 (linear in line items).
+"""
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_marginedge import generate_snapshot
+from product_analysis import get_product_price_changes
+
+SIZES = [10_000, 50_000, 250_000, 1_000_000]
+ITEMS_PER_ORDER = 10
+N_PRODUCTS = 5_000
+
+def make_snapshot(n_line_items, seed=42):
+    # Every invoice within the last 4 days, so the whole snapshot is in the 5-day window
+    return generate_snapshot(n_products=N_PRODUCTS, n_vendors=50, n_line_items=n_line_items,
+                             items_per_order=ITEMS_PER_ORDER, days=4, price_drift=0.05, seed=seed)
+
+def fitted_exponent(sizes, timings):
+    """Least-squares slope of log(time) against log(size)"""
+    xs = [math.log(s) for s in sizes]
+    ys = [math.log(t) for t in timings]
+    x_mean, y_mean = sum(xs) / len(xs), sum(ys) / len(ys)
+    return sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / sum((x - x_mean) ** 2 for x in xs)
+
+def main():
+    timings = []
+    print(f"{'line items':>12} {'seconds':>10} {'us/item':>10} {'changes':>8}")
+    for size in SIZES:
+        data = make_snapshot(size)
+        start = time.perf_counter()
+        changes = get_product_price_changes(days=5, data=data)
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        print(f"{size:>12,} {elapsed:>10.3f} {elapsed / size * 1e6:>10.2f} {len(changes):>8}")
+    print(f"\nFitted growth: time ~ n^{fitted_exponent(SIZES, timings):.2f}")
+
+if __name__ == "__main__":
+    main()
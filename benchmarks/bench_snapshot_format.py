@@ -0,0 +1,74 @@
+"""Compares restaurant_data.json against the .mesnap format: size, load time and peak memory.
+
+Run from the repo root:  python benchmarks/bench_snapshot_format.py
+Each load runs in a fresh interpreter so peak RSS is measured per format and
+nothing is served from the in-process snapshot memo.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_product_price_changes import make_snapshot
+from snapshot_format import write_snapshot
+
+SIZES = [50_000, 250_000, 1_000_000]
+
+# Runs in a child process: prints seconds and peak RSS (KiB) for one load
+_PROBE = """
+import sys, time
+sys.path.insert(0, {root!r})
+mode, path = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+if mode == "json":
+    import json
+    with open(path) as f:
+        json.load(f)
+elif mode == "mesnap":
+    from snapshot_format import read_snapshot
+    read_snapshot(path)
+elif mode == "json-table":
+    from line_item_table import LineItemTable
+    from snapshot_loader import iter_records
+    LineItemTable.from_orders(iter_records(path, "orders"))
+elif mode == "mesnap-table":
+    from line_item_table import LineItemTable
+    LineItemTable.from_binary(path)
+elapsed = time.perf_counter() - start
+# VmHWM rather than ru_maxrss, which Linux carries over from the (large) parent
+with open("/proc/self/status") as f:
+    peak = next(line.split()[1] for line in f if line.startswith("VmHWM:"))
+print(elapsed, peak)
+"""
+
+def probe(mode, path):
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(root=ROOT), mode, path],
+        check=True, capture_output=True, text=True
+    ).stdout.split()
+    return float(out[0]), int(out[1]) / 1024
+
+def main():
+    print(f"{'line items':>12} {'format':>13} {'MB on disk':>11} {'seconds':>9} {'peak MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in SIZES:
+            data = make_snapshot(size)
+            json_path = os.path.join(tmp, f"snapshot_{size}.json")
+            binary_path = os.path.join(tmp, f"snapshot_{size}.mesnap")
+            with open(json_path, 'w') as f:
+                json.dump(data, f, indent=2)
+            write_snapshot(data, binary_path)
+            del data
+
+            for mode, path in [("json", json_path), ("mesnap", binary_path),
+                               ("json-table", json_path), ("mesnap-table", binary_path)]:
+                seconds, peak = probe(mode, path)
+                print(f"{size:>12,} {mode:>13} {os.path.getsize(path) / 1e6:>11.1f} {seconds:>9.3f} {peak:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""Local stand-in for the MarginEdge public API, backed by generated data.
+
+    dataset = generate_dataset(n_products=500, n_orders=2_000)
+    with FakeMarginEdgeServer(dataset, latency=0.01, throttle_rate=0.02) as server:
+        client = MarginEdgeClient("fake")
+        client.base_url = server.base_url
+        ...
+        print(server.stats())
+
+Serves restaurantUnits, categories, products, products/{id},
+products/{id}/priceHistory, vendors, orders and orders/{id} with nextPage
+pagination. Every request sleeps `latency` seconds, and a seeded fraction
+`throttle_rate` is answered with 429 + Retry-After.
+"""
+import json
+import random
+import socket
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+CATEGORIES = ["Meat", "Poultry", "Seafood", "Produce", "Dairy", "Dry Goods", "Wine", "Beer", "Liquor", "Paper"]
+NOUNS = {
+    "Meat": ["Ribeye", "Ground Beef", "Pork Belly", "Short Rib", "Bacon"],
+    "Poultry": ["Chicken Breast", "Chicken Wings", "Chicken Thighs", "Turkey Breast", "Duck Leg"],
+    "Seafood": ["Salmon Fillet", "Shrimp 16/20", "Cod Loin", "Scallops", "Tuna Steak"],
+    "Produce": ["Lemons", "Limes", "Romaine", "Yellow Onions", "Roma Tomatoes"],
+    "Dairy": ["Heavy Cream", "Butter", "Parmesan", "Whole Milk", "Mozzarella"],
+    "Dry Goods": ["AP Flour", "Arborio Rice", "Sugar", "Kosher Salt", "Panko"],
+    "Wine": ["Pinot Noir", "Cabernet Sauvignon", "Chardonnay", "Sauvignon Blanc", "Prosecco"],
+    "Beer": ["IPA Keg", "Lager Case", "Stout Keg", "Pilsner Case", "Cider Case"],
+    "Liquor": ["Bourbon", "Scotch", "Vodka", "Gin", "Tequila"],
+    "Paper": ["Napkins", "To-Go Boxes", "Straws", "Receipt Rolls", "Gloves"],
+}
+
+def generate_dataset(n_units=1, n_products=200, n_vendors=12, n_orders=500, items_per_order=8,
+                     days=90, price_drift=0.0, seed=42, today=None):
+    """Synthetic MarginEdge data: {"units": [...], unit_id: {"categories", "products", "vendors", "orders", "price_history"}}.
+
+    Orders carry their lineItems and are spread over the last `days` days. Every
+    product is stocked by one or two vendors, and an order only contains its
+    vendor's products. Prices follow a random walk with up to `price_drift` (a
+    fraction) of daily noise around a per-category trend, with the odd step
+    change when a vendor reprices, plus +/-2% noise per invoice.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    dataset = {"units": []}
+    for u in range(n_units):
+        unit_id = str(1000 + u)
+        dataset["units"].append({"restaurantUnitId": unit_id, "restaurantUnitName": f"Location {u + 1}"})
+        categories = [{"categoryId": str(i), "categoryName": name} for i, name in enumerate(CATEGORIES)]
+        vendors = [{"vendorId": str(i), "vendorName": f"Vendor {i}"} for i in range(n_vendors)]
+
+        products = []
+        vendor_products = [[] for _ in vendors]
+        for i in range(n_products):
+            category = categories[i % len(categories)]
+            noun = NOUNS[category["categoryName"]][(i // len(categories)) % 5]
+            products.append({
+                "companyConceptProductId": f"{unit_id}-{i}",
+                "productName": f"{noun} #{i}",
+                "categories": [category],
+                "latestPrice": None,
+                "reportByUnit": "each",
+                "taxExempt": i % 7 == 0,
+                "onInventory": i % 3 != 0
+            })
+            for v in rng.sample(range(n_vendors), min(n_vendors, rng.randint(1, 2))):
+                vendor_products[v].append(i)
+
+        # Daily price path per product, oldest first
+        trends = {c["categoryName"]: rng.uniform(-price_drift / 4, price_drift / 2) for c in categories}
+        price_paths = []
+        for product in products:
+            trend = trends[product["categories"][0]["categoryName"]]
+            price = rng.uniform(1, 80)
+            path = []
+            for _ in range(days + 1):
+                path.append(price)
+                step = trend + rng.uniform(-price_drift, price_drift)
+                if price_drift and rng.random() < 0.01:
+                    step += rng.choice([-0.1, 0.1])
+                price = max(0.25, price * (1 + step))
+            price_paths.append(path)
+
+        orders = []
+        stocked = [v for v in range(n_vendors) if vendor_products[v]]
+        for o in range(n_orders):
+            age = rng.randint(0, days)
+            invoice_date = (today - timedelta(days=age)).isoformat()
+            v = rng.choice(stocked)
+            vendor = vendors[v]
+            line_items = []
+            for _ in range(items_per_order):
+                p = rng.choice(vendor_products[v])
+                unit_price = round(price_paths[p][days - age] * rng.uniform(0.98, 1.02), 2)
+                line_items.append({
+                    "companyConceptProductId": products[p]["companyConceptProductId"],
+                    "vendorItemName": products[p]["productName"],
+                    "quantity": rng.randint(1, 12),
+                    "unitPrice": unit_price
+                })
+            orders.append({
+                "orderId": f"{unit_id}-{o}",
+                "vendorId": vendor["vendorId"],
+                "vendorName": vendor["vendorName"],
+                "invoiceDate": invoice_date,
+                "orderTotal": round(sum(i["quantity"] * i["unitPrice"] for i in line_items), 2),
+                "status": "CLOSED" if age > 2 else rng.choice(["OPEN", "CLOSED"]),
+                "lineItems": line_items
+            })
+        orders.sort(key=lambda order: order["invoiceDate"])
+
+        price_history = {}
+        for product, path in zip(products, price_paths):
+            product["latestPrice"] = round(path[-1], 2)
+            price_history[product["companyConceptProductId"]] = [
+                {"date": (today - timedelta(days=days - d)).isoformat(), "price": round(path[d], 2)}
+                for d in range(0, days + 1, 7)
+            ]
+
+        dataset[unit_id] = {
+            "categories": categories,
+            "products": products,
+            "vendors": vendors,
+            "orders": orders,
+            "price_history": price_history
+        }
+    return dataset
+
+def generate_snapshot(n_products=1_000, n_vendors=50, n_line_items=100_000, items_per_order=10,
+                      days=90, price_drift=0.01, seed=42, today=None):
+    """One unit of generate_dataset in the restaurant_data.json layout (orders with lineItems)"""
+    dataset = generate_dataset(n_products=n_products, n_vendors=n_vendors,
+                               n_orders=max(1, n_line_items // items_per_order), items_per_order=items_per_order,
+                               days=days, price_drift=price_drift, seed=seed, today=today)
+    unit = dataset[dataset["units"][0]["restaurantUnitId"]]
+    return {entity: {entity: unit[entity]} for entity in ("categories", "products", "vendors", "orders")}
+
+class FakeMarginEdgeServer:
+    def __init__(self, dataset, latency=0.0, throttle_rate=0.0, retry_after=0.05, page_size=100, seed=0, port=0):
+        self.dataset = dataset
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.page_size = page_size
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._orders = {
+            order["orderId"]: order
+            for unit in dataset["units"]
+            for order in dataset[unit["restaurantUnitId"]]["orders"]
+        }
+        self.reset_stats()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/public"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {"requests": 0, "throttled": 0, "bytes": 0, "by_endpoint": {}}
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, by_endpoint=dict(self._stats["by_endpoint"]))
+
+    def _record(self, family, size, throttled):
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["bytes"] += size
+            self._stats["throttled"] += throttled
+            self._stats["by_endpoint"][family] = self._stats["by_endpoint"].get(family, 0) + 1
+
+    def _throttle(self):
+        with self._lock:
+            return self.throttle_rate and self._rng.random() < self.throttle_rate
+
+    def _paged(self, records, query):
+        start = int(query.get("nextPage", "0"))
+        body = {"records": records[start:start + self.page_size]}
+        if start + self.page_size < len(records):
+            body["nextPage"] = str(start + self.page_size)
+        return body
+
+    def route(self, path, query):
+        """(endpoint family, status, body) for a GET"""
+        parts = path.strip("/").split("/")[1:]
+        unit = self.dataset.get(query.get("restaurantUnitId"))
+        if parts == ["restaurantUnits"]:
+            body = self._paged(self.dataset["units"], query)
+            body["restaurants"] = body.pop("records")
+            return "restaurantUnits", 200, body
+        if unit is None:
+            return "/".join(parts), 400, {"message": "restaurantUnitId is required"}
+        if parts in (["categories"], ["vendors"]):
+            body = self._paged(unit[parts[0]], query)
+            body[parts[0]] = body.pop("records")
+            return parts[0], 200, body
+        if parts == ["products"]:
+            products = unit["products"]
+            if query.get("category"):
+                products = [p for p in products if any(c["categoryName"] == query["category"] for c in p["categories"])]
+            if query.get("search"):
+                products = [p for p in products if query["search"].lower() in p["productName"].lower()]
+            body = self._paged(products, query)
+            body["products"] = body.pop("records")
+            return "products", 200, body
+        if parts == ["orders"]:
+            orders = [
+                {k: v for k, v in order.items() if k != "lineItems"}
+                for order in unit["orders"]
+                if query.get("startDate", "") <= order["invoiceDate"] <= query.get("endDate", "9999")
+                and (not query.get("orderStatus") or order["status"] == query["orderStatus"])
+            ]
+            body = self._paged(orders, query)
+            body["orders"] = body.pop("records")
+            return "orders", 200, body
+        if len(parts) == 2 and parts[0] == "orders":
+            order = self._orders.get(parts[1])
+            return ("orders/{id}", 200, order) if order else ("orders/{id}", 404, {"message": "Order not found"})
+        if len(parts) == 2 and parts[0] == "products":
+            product = next((p for p in unit["products"] if p["companyConceptProductId"] == parts[1]), None)
+            return ("products/{id}", 200, product) if product else ("products/{id}", 404, {"message": "Product not found"})
+        if len(parts) == 3 and parts[0] == "products" and parts[2] == "priceHistory":
+            history = [
+                point for point in unit["price_history"].get(parts[1], [])
+                if query.get("startDate", "") <= point["date"] <= query.get("endDate", "9999")
+            ]
+            return "priceHistory", 200, history
+        return "/".join(parts), 404, {"message": "Not found"}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers and body are separate writes; without this every keep-alive
+                # response waits ~40ms on Nagle + delayed ACK, dwarfing `latency`
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                family, status, body = server.route(url.path, query)
+                if server._throttle():
+                    self._send(429, {"message": "Too Many Requests"}, {"Retry-After": str(server.retry_after)})
+                    server._record(family, 0, 1)
+                    return
+                size = self._send(status, body)
+                server._record(family, size, 0)
+
+            def _send(self, status, body, headers=None):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+                return len(payload)
+
+        return Handler
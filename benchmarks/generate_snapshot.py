@@ -0,0 +1,48 @@
+"""Write a synthetic restaurant_data.json-shaped snapshot at any scale.
+
+Run from the repo root, e.g.:
+    python benchmarks/generate_snapshot.py --products 10000 --vendors 50 --line-items 1000000 --out big.json
+Add --mesnap to also write the compact binary copy next to it.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_marginedge import generate_snapshot
+from snapshot_format import SUFFIX, write_snapshot
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--vendors", type=int, default=50)
+    parser.add_argument("--line-items", type=int, default=1_000_000)
+    parser.add_argument("--items-per-order", type=int, default=10)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--price-drift", type=float, default=0.01, help="max daily price move, as a fraction")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="restaurant_data.json")
+    parser.add_argument("--mesnap", action="store_true", help="also write a .mesnap copy")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    data = generate_snapshot(n_products=args.products, n_vendors=args.vendors, n_line_items=args.line_items,
+                             items_per_order=args.items_per_order, days=args.days,
+                             price_drift=args.price_drift, seed=args.seed)
+    with open(args.out, 'w') as f:
+        json.dump(data, f, indent=2)
+    orders = data['orders']['orders']
+    print(f"{len(orders):,} orders with {sum(len(o['lineItems']) for o in orders):,} line items -> "
+          f"{args.out} ({os.path.getsize(args.out):,} bytes) in {time.perf_counter() - start:.1f}s")
+    if args.mesnap:
+        binary_path = os.path.splitext(args.out)[0] + SUFFIX
+        write_snapshot(data, binary_path)
+        print(f"Compact copy -> {binary_path} ({os.path.getsize(binary_path):,} bytes)")
+
+if __name__ == "__main__":
+    main()
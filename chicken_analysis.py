@@ -1,15 +1,15 @@
 import os
 from dotenv import load_dotenv
 from marginedge_client import MarginEdgeClient
+from order_cache import OrderDetailCache
 from datetime import datetime, timedelta
 import json
-import time
 
 # Load environment variables
 load_dotenv()
 
 # Initialize client
-marginedge_client = MarginEdgeClient(os.getenv('MARGINEDGE_API_KEY'))
+marginedge_client = MarginEdgeClient(os.getenv('MARGINEDGE_API_KEY'), order_cache=OrderDetailCache())
 restaurant_unit_id = os.getenv('RESTAURANT_UNIT_ID')
 
 def find_chicken_products(products):
@@ -18,24 +18,25 @@ def find_chicken_products(products):
 def get_chicken_vendors_and_prices(orders, chicken_products):
     vendors = set()
     price_history = {p['productName']: [] for p in chicken_products}
-    chicken_product_ids = set(p['companyConceptProductId'] for p in chicken_products)
+    chicken_product_names = {p['companyConceptProductId']: p['productName'] for p in chicken_products}
+    orders_by_id = {order['orderId']: order for order in orders}
     
-    for order in orders[:5]:  # Limit to first 5 orders
-        try:
-            order_details = marginedge_client.get_order_detail(restaurant_unit_id, order['orderId'])
-            print(f"Processing order {order['orderId']}...")
-            for item in order_details.get('lineItems', []):
-                if item.get('companyConceptProductId') in chicken_product_ids:
-                    vendors.add(order.get('vendorName'))
-                    product_name = next(p['productName'] for p in chicken_products if p['companyConceptProductId'] == item.get('companyConceptProductId'))
-                    price_history[product_name].append({
-                        'date': order.get('invoiceDate'),
-                        'price': item.get('unitPrice'),
-                        'vendor': order.get('vendorName')
-                    })
-            time.sleep(1)  # Add a 1-second delay between requests to avoid rate limiting
-        except Exception as e:
-            print(f"Error fetching details for order {order['orderId']}: {str(e)}")
+    # Details are fetched concurrently under the client's rate limiter and handled as they land
+    for order_id, order_details in marginedge_client.get_order_details(restaurant_unit_id, orders_by_id.keys(), return_exceptions=True):
+        if isinstance(order_details, Exception):
+            print(f"Error fetching details for order {order_id}: {str(order_details)}")
+            continue
+        order = orders_by_id[order_id]
+        print(f"Processing order {order_id}...")
+        for item in order_details.get('lineItems', []):
+            product_name = chicken_product_names.get(item.get('companyConceptProductId'))
+            if product_name is not None:
+                vendors.add(order.get('vendorName'))
+                price_history[product_name].append({
+                    'date': order.get('invoiceDate'),
+                    'price': item.get('unitPrice'),
+                    'vendor': order.get('vendorName')
+                })
     
     # Sort price history by date
     for product in price_history:
@@ -64,7 +65,7 @@ def main():
     print("\n" + "="*50 + "\n")
     
     # 2 & 3. Who do we buy chicken from and what's the price history?
-    print("Fetching detailed order information (limited to first 5 orders)...")
+    print(f"Fetching detailed order information for {len(orders)} orders...")
     chicken_vendors, price_history = get_chicken_vendors_and_prices(orders, chicken_products)
     
     print("\nChicken vendors:")
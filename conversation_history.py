@@ -0,0 +1,110 @@
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Per-message framing the chat format adds on top of the content
+_MESSAGE_OVERHEAD = 4
+
+def count_tokens(text):
+    """Rough token count for text (~4 characters per token)"""
+    return len(text) // 4
+
+def estimate_tokens(message):
+    """Rough token count for a chat message"""
+    text = message.get("content") or ""
+    for key in ("tool_calls", "function_call"):
+        if message.get(key):
+            text += json.dumps(message[key])
+    return _MESSAGE_OVERHEAD + count_tokens(text)
+
+def _is_tool_message(message):
+    return message.get("role") in ("tool", "function") or bool(message.get("tool_calls") or message.get("function_call"))
+
+class ConversationHistory:
+    """Betty's chat history, held under a token budget.
+
+    Each turn is stored as its messages (user question, tool calls and results,
+    final answer). Raw tool payloads are only kept for the last `keep_tool_turns`
+    turns; older turns shrink to question + answer. When the total goes over
+    `max_tokens`, the oldest turns are folded into a rolling summary by
+    `summarize(summary, messages) -> str` until the history is back under
+    `target_ratio` of the budget, so summarizing happens every few turns rather
+    than on every one. The newest `min_turns` turns are always kept verbatim.
+    """
+
+    def __init__(self, summarize=None, max_tokens=3000, target_ratio=0.6, min_turns=2, keep_tool_turns=1):
+        self.summarize = summarize
+        self.max_tokens = max_tokens
+        self.target_ratio = target_ratio
+        self.min_turns = min_turns
+        self.keep_tool_turns = keep_tool_turns
+        self.summary = ""
+        # [messages, tokens] per turn, oldest first
+        self._turns = []
+
+    def __len__(self):
+        return len(self._turns)
+
+    @property
+    def tokens(self):
+        summary_tokens = estimate_tokens(self._summary_message()) if self.summary else 0
+        return summary_tokens + sum(tokens for _, tokens in self._turns)
+
+    def _summary_message(self):
+        return {"role": "system", "content": f"Summary of the earlier conversation: {self.summary}"}
+
+    def messages(self):
+        """Messages to send ahead of the next question"""
+        messages = [self._summary_message()] if self.summary else []
+        for turn, _ in self._turns:
+            messages.extend(turn)
+        return messages
+
+    def add_turn(self, messages):
+        messages = [dict(m) for m in messages]
+        self._turns.append([messages, sum(estimate_tokens(m) for m in messages)])
+        self._drop_tool_payloads()
+        if self.tokens > self.max_tokens:
+            self._compact()
+        logger.info("History: %d tokens in %d turns (summary %d chars)", self.tokens, len(self._turns), len(self.summary))
+
+    def clear(self):
+        self.summary = ""
+        self._turns = []
+
+    def _drop_tool_payloads(self):
+        stale = self._turns[:-self.keep_tool_turns] if self.keep_tool_turns else self._turns
+        for entry in stale:
+            if any(_is_tool_message(m) for m in entry[0]):
+                entry[0] = [m for m in entry[0] if not _is_tool_message(m)]
+                entry[1] = sum(estimate_tokens(m) for m in entry[0])
+
+    def _compact(self):
+        target = self.max_tokens * self.target_ratio
+        folded = []
+        while len(self._turns) > self.min_turns and self.tokens > target:
+            folded.extend(self._turns.pop(0)[0])
+        if not folded:
+            return
+        self.summary = self._summarize([m for m in folded if not _is_tool_message(m)])
+
+    def _summarize(self, messages):
+        if self.summarize is not None:
+            try:
+                return self.summarize(self.summary, messages)
+            except Exception as e:
+                logger.warning("Summarizing history failed, keeping questions only: %s", e)
+        # No summarizer (or it failed): remember what was asked, and not much else
+        questions = "; ".join(m["content"] for m in messages if m.get("role") == "user" and m.get("content"))
+        summary = f"{self.summary} Earlier questions: {questions}".strip()
+        # max_tokens characters is about a quarter of the token budget
+        return summary[-self.max_tokens:]
+
+def format_transcript(messages):
+    """User/Betty transcript of question-and-answer messages, e.g. for a summarization prompt"""
+    speakers = {"user": "User", "assistant": "Betty"}
+    return "\n".join(
+        f"{speakers[m['role']]}: {m['content']}"
+        for m in messages if m.get("role") in speakers and m.get("content")
+    )
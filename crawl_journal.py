@@ -0,0 +1,132 @@
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_FILE = '.crawl_journal.jsonl'
+
+class CrawlJournal:
+    """Append-only checkpoint of a crawl in progress, so a crashed run can resume.
+
+    Every fetched listing page is written with the nextPage cursor that follows
+    it, completed listings are marked done, and every fetched order detail is
+    recorded. Given the journal, MarginEdgeClient replays what it already has and
+    continues each listing from its saved cursor, never re-requesting a page.
+
+    Listings are keyed by endpoint plus every parameter, so a new date window
+    starts fresh. The journal is meant to be clear()ed once a crawl has been
+    saved; one older than max_age seconds is discarded on load.
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL_FILE, max_age=24 * 3600):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._reset()
+        if os.path.exists(path):
+            self._load()
+
+    def _reset(self):
+        # listing key -> {"pages": [[records], ...], "cursor": nextPage, "done": bool}
+        self._listings = {}
+        # (restaurant_unit_id, order_id) -> detail
+        self._details = {}
+        self.created_at = time.time()
+
+    @staticmethod
+    def _key(endpoint, params):
+        params = {k: v for k, v in (params or {}).items() if k != 'nextPage'}
+        return json.dumps([endpoint, sorted(params.items())], default=str)
+
+    def _load(self):
+        entries = []
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # A write cut short by the crash; everything before it is intact
+                    logger.warning("Ignoring truncated crawl journal entry in %s", self.path)
+                    break
+        if not entries or entries[0].get("type") != "start" or time.time() - entries[0]["at"] > self.max_age:
+            logger.info("Discarding stale crawl journal %s", self.path)
+            os.remove(self.path)
+            return
+        self.created_at = entries[0]["at"]
+        for entry in entries[1:]:
+            kind = entry["type"]
+            if kind == "page":
+                listing = self._listings.setdefault(entry["key"], {"pages": [], "cursor": None, "done": False})
+                listing["pages"].append(entry["records"])
+                listing["cursor"] = entry["cursor"]
+            elif kind == "done":
+                self._listings.setdefault(entry["key"], {"pages": [], "cursor": None, "done": False})["done"] = True
+            elif kind == "detail":
+                self._details[(str(entry["unit"]), str(entry["order_id"]))] = entry["detail"]
+            elif kind == "forget_detail":
+                self._details.pop((str(entry["unit"]), str(entry["order_id"])), None)
+        logger.info("Resuming crawl journal %s: %s", self.path, self.stats())
+
+    def _append(self, entry):
+        """Write one entry (lock held), starting the file if needed"""
+        new_file = not os.path.exists(self.path)
+        with open(self.path, 'a') as f:
+            if new_file:
+                self.created_at = time.time()
+                f.write(json.dumps({"type": "start", "at": self.created_at}) + "\n")
+            f.write(json.dumps(entry, default=str) + "\n")
+
+    def listing(self, endpoint, params=None):
+        """(records so far, cursor for the next page, done) for a listing"""
+        with self._lock:
+            listing = self._listings.get(self._key(endpoint, params))
+            if listing is None:
+                return [], None, False
+            return [r for page in listing["pages"] for r in page], listing["cursor"], listing["done"]
+
+    def add_page(self, endpoint, params, records, next_page):
+        key = self._key(endpoint, params)
+        with self._lock:
+            listing = self._listings.setdefault(key, {"pages": [], "cursor": None, "done": False})
+            listing["pages"].append(list(records))
+            listing["cursor"] = next_page
+            self._append({"type": "page", "key": key, "records": records, "cursor": next_page})
+
+    def complete(self, endpoint, params=None):
+        key = self._key(endpoint, params)
+        with self._lock:
+            self._listings.setdefault(key, {"pages": [], "cursor": None, "done": False})["done"] = True
+            self._append({"type": "done", "key": key})
+
+    def get_detail(self, restaurant_unit_id, order_id):
+        with self._lock:
+            return self._details.get((str(restaurant_unit_id), str(order_id)))
+
+    def add_detail(self, restaurant_unit_id, order_id, detail):
+        with self._lock:
+            self._details[(str(restaurant_unit_id), str(order_id))] = detail
+            self._append({"type": "detail", "unit": restaurant_unit_id, "order_id": order_id, "detail": detail})
+
+    def forget_detail(self, restaurant_unit_id, order_id):
+        """Drop a recorded detail (e.g. the order changed upstream) so it is fetched again"""
+        with self._lock:
+            if self._details.pop((str(restaurant_unit_id), str(order_id)), None) is not None:
+                self._append({"type": "forget_detail", "unit": restaurant_unit_id, "order_id": order_id})
+
+    def clear(self):
+        """Forget everything; call once the crawl's results are safely saved"""
+        with self._lock:
+            self._reset()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def stats(self):
+        return {
+            "listings": len(self._listings),
+            "completed_listings": sum(1 for listing in self._listings.values() if listing["done"]),
+            "pages": sum(len(listing["pages"]) for listing in self._listings.values()),
+            "order_details": len(self._details)
+        }
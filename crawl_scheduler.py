@@ -0,0 +1,125 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class CrawlScheduler:
+    """Runs crawl tasks as a dependency graph on a worker pool.
+
+    A task is a name, a function called with the dict of finished results, and the
+    names of the tasks it needs. Tasks start as soon as their dependencies finish,
+    and a running task may add more (e.g. per-unit tasks once the unit list is in).
+    Tasks whose dependencies failed are skipped. Each task prints a progress line
+    with its timing when it finishes.
+    """
+
+    def __init__(self, max_workers=8, verbose=True):
+        self.max_workers = max_workers
+        self.verbose = verbose
+        self.results = {}
+        # name -> {"status", "seconds", "error", ...}
+        self.report = {}
+        self.elapsed = 0.0
+        self._tasks = {}
+        self._waiting = []
+        self._running = 0
+        self._lock = threading.Condition()
+        self._executor = None
+
+    def add(self, name, fn, deps=()):
+        with self._lock:
+            if name in self._tasks:
+                raise ValueError(f"Duplicate crawl task {name}")
+            self._tasks[name] = (fn, tuple(deps))
+            self._waiting.append(name)
+            if self._executor is not None:
+                self._submit_ready()
+
+    def run(self):
+        """Run every task (including ones added along the way); returns (results, report).
+
+        Wall time ends up in self.elapsed.
+        """
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crawl") as executor:
+            with self._lock:
+                self._executor = executor
+                self._submit_ready()
+                while self._running:
+                    self._lock.wait()
+                self._executor = None
+                # Anything still waiting depends on a task that never ran
+                for name in self._waiting:
+                    self.report[name] = {"status": "skipped", "seconds": 0.0, "error": "dependency not run"}
+                self._waiting = []
+        self.elapsed = time.perf_counter() - start
+        return self.results, self.report
+
+    def _submit_ready(self):
+        """Start every waiting task whose dependencies are done (lock held)"""
+        progressed = True
+        while progressed:
+            progressed = False
+            for name in list(self._waiting):
+                fn, deps = self._tasks[name]
+                failed = [dep for dep in deps if self.report.get(dep, {}).get("status") in ("failed", "skipped")]
+                if failed:
+                    self._waiting.remove(name)
+                    self.report[name] = {"status": "skipped", "seconds": 0.0, "error": f"needs {', '.join(failed)}"}
+                    self._progress(name)
+                    progressed = True
+                elif all(dep in self.results for dep in deps):
+                    self._waiting.remove(name)
+                    self._running += 1
+                    self._executor.submit(self._run_task, name, fn)
+
+    def _run_task(self, name, fn):
+        start = time.perf_counter()
+        result = None
+        # Anything else (e.g. KeyboardInterrupt in a worker) still counts as a failure
+        # below, so run() is never left waiting on a task that won't finish
+        entry = {"status": "failed", "seconds": 0.0, "error": "interrupted"}
+        try:
+            result = fn(self.results)
+        except Exception as e:
+            logger.error("Crawl task %s failed: %s", name, e)
+            entry["error"] = str(e)
+        else:
+            entry = {"status": "done"}
+            if isinstance(result, (list, dict)):
+                entry["records"] = len(result)
+        finally:
+            entry["seconds"] = time.perf_counter() - start
+            with self._lock:
+                if entry["status"] == "done":
+                    self.results[name] = result
+                self.report[name] = entry
+                self._running -= 1
+                self._progress(name)
+                self._submit_ready()
+                self._lock.notify_all()
+
+    def _progress(self, name):
+        if not self.verbose:
+            return
+        entry = self.report[name]
+        finished = len(self.report)
+        total = len(self._tasks)
+        detail = f"{entry['records']} records" if "records" in entry else entry["status"]
+        if entry.get("error"):
+            detail += f" ({entry['error']})"
+        print(f"[{finished:>3}/{total}] {name}: {detail} in {entry['seconds']:.2f}s")
+
+def format_crawl_report(report, elapsed):
+    busy = sum(entry["seconds"] for entry in report.values())
+    failed = [name for name, entry in report.items() if entry["status"] != "done"]
+    lines = [f"Crawl finished: {len(report)} tasks in {elapsed:.2f}s wall, {busy:.2f}s of task time"]
+    if elapsed:
+        lines.append(f"Concurrency speedup over running them serially: {busy / elapsed:.1f}x")
+    slowest = sorted(report.items(), key=lambda item: item[1]["seconds"], reverse=True)[:5]
+    lines.append("Slowest: " + ", ".join(f"{name} {entry['seconds']:.2f}s" for name, entry in slowest))
+    if failed:
+        lines.append("Not completed: " + ", ".join(failed))
+    return "\n".join(lines)
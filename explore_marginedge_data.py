@@ -4,29 +4,47 @@
 import os
 from dotenv import load_dotenv
 from marginedge_client import MarginEdgeClient
+from order_cache import OrderDetailCache
+from crawl_journal import CrawlJournal
+from sync_engine import SyncEngine, format_report
+from local_store import DEFAULT_DB_PATH, LocalStore
+from snapshot_loader import load_snapshot, invalidate
+from snapshot_format import SUFFIX, write_snapshot
+import copy
 import json
 
 # Load environment variables
 load_dotenv()
 
 # Initialize client
-marginedge_client = MarginEdgeClient(os.getenv('MARGINEDGE_API_KEY'))
+journal = CrawlJournal('restaurant_data.journal.jsonl')
+marginedge_client = MarginEdgeClient(os.getenv('MARGINEDGE_API_KEY'), order_cache=OrderDetailCache(), journal=journal)
 restaurant_unit_id = os.getenv('RESTAURANT_UNIT_ID')
 
 # File to store our data
 DATA_FILE = 'restaurant_data.json'
+SYNC_STATE_FILE = 'restaurant_data.sync.json'
 
 def update_data():
-    """Fetch new data and update our stored data"""
-    new_data = marginedge_client.get_all_data(restaurant_unit_id)
+    """Fetch new or changed data and merge it into our stored data"""
+    # The sync merges in place, so work on a copy rather than the memoized snapshot
+    snapshot = copy.deepcopy(load_data()) if os.path.exists(DATA_FILE) else None
+    # The SQLite mirror is what the GPT tools answer from
+    with LocalStore(DEFAULT_DB_PATH) as store:
+        engine = SyncEngine(marginedge_client, SYNC_STATE_FILE, store=store)
+        new_data, report = engine.sync(restaurant_unit_id, snapshot)
     with open(DATA_FILE, 'w') as f:
         json.dump(new_data, f, indent=2)
+    # Written after the JSON so the columnar loaders see it as up to date
+    write_snapshot(new_data, os.path.splitext(DATA_FILE)[0] + SUFFIX)
+    invalidate(DATA_FILE)
+    journal.clear()
+    print(format_report(report))
     print("Data updated successfully")
 
 def load_data():
-    """Load data from file"""
-    with open(DATA_FILE, 'r') as f:
-        return json.load(f)
+    """Load data from file (parsed once, reparsed only when the file changes)"""
+    return load_snapshot(DATA_FILE)
 
 def explore_data(data, path=[]):
     """Recursively explore the data structure"""
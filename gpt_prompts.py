@@ -16,6 +16,13 @@ If you're unable to retrieve certain data, inform the user and suggest alternati
 Remember, your responses should be informative yet maintain the Terminator-like personality.
 """
 
+SUMMARY_PROMPT = """
+You maintain the running summary of a conversation between restaurant staff and Betty, their analytics assistant.
+Merge the new exchanges into the existing summary. Keep the products, vendors, prices, figures and decisions
+that later questions may refer back to. Drop greetings, banter and anything superseded.
+Reply with the updated summary only, in at most 150 words.
+"""
+
 FUNCTION_DESCRIPTIONS = [
     {
         "name": "search_products",
@@ -1,20 +1,36 @@
 from datetime import datetime, timedelta
+from product_index import ProductIndex
+from price_changes import compute_price_changes
+
+# One index per (client, unit), rebuilt incrementally when the catalog listing changes
+_product_indexes = {}
+
+def _catalog_version(client, restaurant_unit_id):
+    """Version of the product listing the client would return, or None if it can't tell"""
+    if hasattr(client, "catalog_version"):
+        return client.catalog_version(restaurant_unit_id)
+    cache = getattr(client, "response_cache", None)
+    return cache.version("products", {"restaurantUnitId": restaurant_unit_id}) if cache is not None else None
+
+def get_product_index(client, restaurant_unit_id):
+    key = (id(client), restaurant_unit_id)
+    index = _product_indexes.get(key)
+    if index is None:
+        index = _product_indexes[key] = ProductIndex()
+    # The listing is only re-read when its version changes; without one there
+    # is no way to tell, so update (incrementally) every time
+    version = _catalog_version(client, restaurant_unit_id)
+    if version is None or index.source != version:
+        index.update(client.get_products(restaurant_unit_id))
+        index.source = _catalog_version(client, restaurant_unit_id)
+    return index
 
 def search_products(client, restaurant_unit_id, query):
-    query = query.lower()
-    all_products = client.get_products(restaurant_unit_id)
-    
-    matching_products = []
-    for product in all_products:
-        product_name = product["productName"].lower()
-        product_category = product["categories"][0].get("categoryName", "").lower() if product.get("categories") else ""
-        
-        # Check for wines
-        if query == "all wines" and ("wine" in product_name or "wine" in product_category):
-            matching_products.append(product)
-        # Check for other queries
-        elif query in product_name or query in product_category:
-            matching_products.append(product)
+    query = query.lower().strip()
+    # "all wines" has always meant anything with wine in the name or category
+    if query == "all wines":
+        query = "wine"
+    matching_products = get_product_index(client, restaurant_unit_id).search(query)
     
     return [
         {
@@ -26,8 +42,6 @@ def search_products(client, restaurant_unit_id, query):
         }
         for p in matching_products
     ]
-    
-    return matching_products
 
 def get_product_details(client, restaurant_unit_id, product_name):
     products = search_products(client, restaurant_unit_id, product_name)
@@ -79,9 +93,10 @@ def get_vendor_purchases(client, restaurant_unit_id, product_name):
     start_date = end_date - timedelta(days=90)
     orders = client.get_orders(restaurant_unit_id, start_date.isoformat(), end_date.isoformat())
     
+    orders_by_id = {order["orderId"]: order for order in orders}
     purchases = []
-    for order in orders:
-        order_details = client.get_order_detail(restaurant_unit_id, order["orderId"])
+    for order_id, order_details in client.get_order_details(restaurant_unit_id, orders_by_id.keys()):
+        order = orders_by_id[order_id]
         for item in order_details.get("lineItems", []):
             if item["companyConceptProductId"] == product["id"]:
                 purchases.append({
@@ -92,15 +107,15 @@ def get_vendor_purchases(client, restaurant_unit_id, product_name):
                     "total_price": item["quantity"] * item["unitPrice"]
                 })
     
+    # Details arrive in completion order, so put them back in date order
+    purchases.sort(key=lambda p: p["date"])
     return purchases
 
 def get_top_vendors_by_spend(client, restaurant_unit_id, limit=5):
     end_date = datetime.now().date()
     start_date = end_date - timedelta(days=90)
-    orders = client.get_orders(restaurant_unit_id, start_date.isoformat(), end_date.isoformat())
-    
     vendor_spend = {}
-    for order in orders:
+    for order in client.iter_orders(restaurant_unit_id, start_date.isoformat(), end_date.isoformat()):
         vendor_name = order["vendorName"]
         order_total = order["orderTotal"]
         vendor_spend[vendor_name] = vendor_spend.get(vendor_name, 0) + order_total
@@ -111,28 +126,18 @@ def get_top_vendors_by_spend(client, restaurant_unit_id, limit=5):
 def get_product_price_changes(client, restaurant_unit_id, days=5):
     end_date = datetime.now().date()
     start_date = end_date - timedelta(days=days)
-    products = client.get_products(restaurant_unit_id)
+    changes = compute_price_changes(client, restaurant_unit_id, start_date.isoformat(), end_date.isoformat())
     
-    price_changes = []
-    for product in products:
-        try:
-            history = client.get_product_price_history(
-                restaurant_unit_id,
-                product["companyConceptProductId"],
-                start_date.isoformat(),
-                end_date.isoformat()
-            )
-            if len(history) > 1 and history[0]["price"] != history[-1]["price"]:
-                price_changes.append({
-                    "name": product["productName"],
-                    "old_price": history[0]["price"],
-                    "new_price": history[-1]["price"],
-                    "change": history[-1]["price"] - history[0]["price"]
-                })
-        except Exception:
-            continue
-    
-    return price_changes
+    return [
+        {
+            "name": c["name"],
+            "old_price": c["old_price"],
+            "new_price": c["new_price"],
+            "change": c["change"],
+            "percent_change": c["percent_change"]
+        }
+        for c in changes
+    ]
 
 def analyze_price_trends(client, restaurant_unit_id, product_name, days=30):
     products = search_products(client, restaurant_unit_id, product_name)
@@ -174,7 +179,7 @@ def analyze_price_trends(client, restaurant_unit_id, product_name, days=30):
 def evaluate_vendor_performance(client, restaurant_unit_id, vendor_name):
     end_date = datetime.now().date()
     start_date = end_date - timedelta(days=90)
-    orders = client.get_orders(restaurant_unit_id, start_date.isoformat(), end_date.isoformat())
+    orders = client.iter_orders(restaurant_unit_id, start_date.isoformat(), end_date.isoformat())
     
     vendor_orders = [order for order in orders if order["vendorName"] == vendor_name]
     
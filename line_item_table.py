@@ -0,0 +1,240 @@
+from datetime import date, datetime
+import numpy as np
+from snapshot_format import SnapshotReader, is_binary_snapshot
+from snapshot_loader import derived, iter_records, snapshot_source
+
+class StringPool:
+    """Interns strings to dense int codes so columns can hold plain integers"""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def intern(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def codes_matching(self, predicate):
+        return np.array([code for code, value in enumerate(self.values) if predicate(value)], dtype=np.int32)
+
+def to_ordinal(value):
+    """ISO invoice date (with or without a time part) -> proleptic Gregorian ordinal"""
+    if not value:
+        return 0
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+def from_ordinal(ordinal):
+    return date.fromordinal(int(ordinal)).isoformat() if ordinal else None
+
+class LineItemTable:
+    """Columnar, NumPy-backed view of a snapshot's orders and their line items.
+
+    Built once from the nested order dicts; after that every aggregation is a
+    vectorized reduction over flat arrays instead of a Python loop over dicts.
+
+    Line-item columns: order (row in the order columns), product, vendor, item_name
+    (interned string codes), date (ordinal), quantity, unit_price.
+    Order columns: order_vendor, order_date, order_total.
+    """
+
+    def __init__(self):
+        self.products = StringPool()
+        self.vendors = StringPool()
+        self.item_names = StringPool()
+
+    @classmethod
+    def from_snapshot(cls, data):
+        return cls.from_orders(data.get('orders', {}).get('orders', []))
+
+    @classmethod
+    def from_orders(cls, orders):
+        table = cls()
+        product_intern = table.products.intern
+        vendor_intern = table.vendors.intern
+        item_intern = table.item_names.intern
+
+        order_vendor, order_date, order_total = [], [], []
+        order, product, vendor, item_name, dates, quantity, unit_price = [], [], [], [], [], [], []
+        for row, o in enumerate(orders):
+            vendor_code = vendor_intern(o.get('vendorName', 'Unknown Vendor'))
+            ordinal = to_ordinal(o.get('invoiceDate'))
+            order_vendor.append(vendor_code)
+            order_date.append(ordinal)
+            order_total.append(float(o.get('orderTotal', 0) or 0))
+            for item in o.get('lineItems', []):
+                order.append(row)
+                product.append(product_intern(item.get('companyConceptProductId')))
+                vendor.append(vendor_code)
+                item_name.append(item_intern(item.get('vendorItemName', 'Unknown Product')))
+                dates.append(ordinal)
+                quantity.append(item.get('quantity', 0) or 0)
+                unit_price.append(item.get('unitPrice', 0) or 0)
+
+        table.order_vendor = np.array(order_vendor, dtype=np.int32)
+        table.order_date = np.array(order_date, dtype=np.int32)
+        table.order_total = np.array(order_total, dtype=np.float64)
+        table.order = np.array(order, dtype=np.int64)
+        table.product = np.array(product, dtype=np.int32)
+        table.vendor = np.array(vendor, dtype=np.int32)
+        table.item_name = np.array(item_name, dtype=np.int32)
+        table.date = np.array(dates, dtype=np.int32)
+        table.quantity = np.array(quantity, dtype=np.float64)
+        table.unit_price = np.array(unit_price, dtype=np.float64)
+        return table
+
+    @classmethod
+    def from_binary(cls, path):
+        """Build straight from a .mesnap file's columns, without materializing order dicts"""
+        with SnapshotReader(path) as reader:
+            name = next((n for n in ('orders/orders', 'orders') if n in reader.header["tables"]), None)
+            if name is None:
+                return cls.from_orders([])
+            orders = reader.table(name)
+            if 'lineItems' in orders.columns and orders.kind('lineItems') != 'table':
+                # No line item records at all, or irregular ones: take the dict path
+                return cls.from_orders(orders.to_records())
+
+            table = cls()
+            table.order_vendor = _column_codes(orders, 'vendorName', table.vendors, 'Unknown Vendor')
+            table.order_date = _column_ordinals(orders, 'invoiceDate')
+            table.order_total = _column_numbers(orders, 'orderTotal')
+
+            if 'lineItems' in orders.columns:
+                offsets, items = orders.child('lineItems')
+                table.order = np.repeat(np.arange(len(orders), dtype=np.int64), np.diff(offsets))
+            else:
+                items = None
+                table.order = np.zeros(0, dtype=np.int64)
+            table.product = _column_codes(items, 'companyConceptProductId', table.products, None)
+            table.vendor = table.order_vendor[table.order]
+            table.item_name = _column_codes(items, 'vendorItemName', table.item_names, 'Unknown Product')
+            table.date = table.order_date[table.order]
+            table.quantity = _column_numbers(items, 'quantity')
+            table.unit_price = _column_numbers(items, 'unitPrice')
+            return table
+
+    def __len__(self):
+        return len(self.product)
+
+    # Row masks
+
+    def vendor_mask(self, vendor_name, orders=False):
+        """Rows for a vendor, matched case-insensitively"""
+        target = vendor_name.lower()
+        codes = self.vendors.codes_matching(lambda name: (name or '').lower() == target)
+        return np.isin(self.order_vendor if orders else self.vendor, codes)
+
+    def date_mask(self, after=None, orders=False):
+        """Rows whose invoice date is strictly after `after` (a date or datetime)"""
+        column = self.order_date if orders else self.date
+        if after is None:
+            return np.ones(len(column), dtype=bool)
+        if isinstance(after, datetime):
+            after = after.date()
+        return column > after.toordinal()
+
+    # Group-by reductions
+
+    def _sum_by(self, codes, weights, pool, mask):
+        if mask is not None:
+            codes, weights = codes[mask], weights[mask]
+        totals = np.bincount(codes, weights=weights, minlength=len(pool))
+        present = np.bincount(codes, minlength=len(pool)) > 0
+        return {pool.values[code]: float(totals[code]) for code in np.flatnonzero(present)}
+
+    def spend_by_vendor(self, mask=None):
+        """Line-item spend (quantity * unit price) per vendor"""
+        return self._sum_by(self.vendor, self.quantity * self.unit_price, self.vendors, mask)
+
+    def spend_by_product(self, mask=None, by_item_name=False):
+        """Line-item spend per product ID (or per vendor item name)"""
+        codes, pool = (self.item_name, self.item_names) if by_item_name else (self.product, self.products)
+        return self._sum_by(codes, self.quantity * self.unit_price, pool, mask)
+
+    def order_totals_by_vendor(self, mask=None):
+        """Sum of orderTotal per vendor, over the order columns"""
+        return self._sum_by(self.order_vendor, self.order_total, self.vendors, mask)
+
+    def price_stats_by_product(self, mask=None):
+        """Min, max, first and last (by invoice date) unit price per product ID"""
+        product, dates, price = self.product, self.date, self.unit_price
+        if mask is not None:
+            product, dates, price = product[mask], dates[mask], price[mask]
+        if not len(product):
+            return {}
+        # Sort by product, then date (stable, so same-day rows keep their order)
+        order = np.lexsort((dates, product))
+        product, dates, price = product[order], dates[order], price[order]
+        starts = np.flatnonzero(np.r_[True, product[1:] != product[:-1]])
+        ends = np.r_[starts[1:], len(product)] - 1
+        mins = np.minimum.reduceat(price, starts)
+        maxs = np.maximum.reduceat(price, starts)
+        counts = ends - starts + 1
+        return {
+            self.products.values[product[s]]: {
+                "min": float(mins[i]),
+                "max": float(maxs[i]),
+                "first": float(price[s]),
+                "last": float(price[e]),
+                "first_date": from_ordinal(dates[s]),
+                "last_date": from_ordinal(dates[e]),
+                "count": int(counts[i])
+            }
+            for i, (s, e) in enumerate(zip(starts, ends))
+        }
+
+def _column_codes(view, name, pool, default):
+    """Intern a column into `pool` (missing -> default), in first-appearance order like from_orders"""
+    if view is None:
+        return np.zeros(0, dtype=np.int32)
+    if name not in view.columns:
+        return np.full(view.rows, pool.intern(default) if view.rows else 0, dtype=np.int32)
+    if view.kind(name) != 'str':
+        present = view.present(name).tolist()
+        return np.array([pool.intern(v if p else default) for v, p in zip(view.values(name), present)], dtype=np.int32)
+    codes, dictionary = view.strings(name)
+    # -1 is an explicit null, -2 a missing key
+    keys = np.where(view.present(name), codes, -2)
+    uniq, first = np.unique(keys, return_index=True)
+    values = {-1: None, -2: default}
+    mapping = np.zeros(len(dictionary) + 2, dtype=np.int32)
+    for key in uniq[np.argsort(first)].tolist():
+        mapping[key] = pool.intern(values[key] if key < 0 else dictionary[key])
+    return mapping[keys]
+
+def _column_ordinals(view, name):
+    if name not in view.columns:
+        return np.zeros(view.rows, dtype=np.int32)
+    if view.kind(name) != 'str':
+        return np.array([to_ordinal(v) for v in view.values(name)], dtype=np.int32)
+    codes, dictionary = view.strings(name)
+    ordinals = np.array([to_ordinal(v) for v in dictionary] + [0], dtype=np.int32)
+    return ordinals[codes]
+
+def _column_numbers(view, name):
+    if view is None:
+        return np.zeros(0, dtype=np.float64)
+    if name not in view.columns:
+        return np.zeros(view.rows, dtype=np.float64)
+    if view.kind(name) in ('int', 'num', 'bool'):
+        return view.array(name).astype(np.float64)
+    return np.array([v or 0 for v in view.values(name)], dtype=np.float64)
+
+def load_table(file_path):
+    """LineItemTable for a snapshot file, memoized until the file changes.
+
+    Built from the .mesnap columns when there is an up-to-date one, otherwise from
+    streamed orders, so the full JSON is never materialized.
+    """
+    source = snapshot_source(file_path, columnar=True)
+    if is_binary_snapshot(source):
+        build = lambda: LineItemTable.from_binary(source)
+    else:
+        build = lambda: LineItemTable.from_orders(iter_records(source, 'orders'))
+    return derived(file_path, 'line_item_table', build, columnar=True)
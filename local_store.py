@@ -0,0 +1,433 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+
+DEFAULT_DB_PATH = 'marginedge.db'
+
+# Fields of the products/{id} payload that the products listing may not carry
+PRODUCT_DETAIL_FIELDS = ("taxExempt", "onInventory")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    restaurant_unit_id TEXT NOT NULL,
+    category_id TEXT NOT NULL,
+    category_name TEXT,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (restaurant_unit_id, category_id)
+);
+
+CREATE TABLE IF NOT EXISTS products (
+    restaurant_unit_id TEXT NOT NULL,
+    product_id TEXT NOT NULL,
+    product_name TEXT,
+    category_name TEXT,
+    latest_price REAL,
+    report_by_unit TEXT,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (restaurant_unit_id, product_id)
+);
+CREATE INDEX IF NOT EXISTS idx_products_name ON products (restaurant_unit_id, product_name COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS vendors (
+    restaurant_unit_id TEXT NOT NULL,
+    vendor_id TEXT NOT NULL,
+    vendor_name TEXT,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (restaurant_unit_id, vendor_id)
+);
+CREATE INDEX IF NOT EXISTS idx_vendors_name ON vendors (restaurant_unit_id, vendor_name COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS orders (
+    restaurant_unit_id TEXT NOT NULL,
+    order_id TEXT NOT NULL,
+    vendor_id TEXT,
+    vendor_name TEXT,
+    invoice_date TEXT,
+    status TEXT,
+    order_total REAL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (restaurant_unit_id, order_id)
+);
+CREATE INDEX IF NOT EXISTS idx_orders_date ON orders (restaurant_unit_id, invoice_date);
+CREATE INDEX IF NOT EXISTS idx_orders_vendor ON orders (restaurant_unit_id, vendor_name COLLATE NOCASE, invoice_date);
+
+CREATE TABLE IF NOT EXISTS order_line_items (
+    restaurant_unit_id TEXT NOT NULL,
+    order_id TEXT NOT NULL,
+    line_number INTEGER NOT NULL,
+    product_id TEXT,
+    vendor_item_name TEXT,
+    quantity REAL,
+    unit_price REAL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (restaurant_unit_id, order_id, line_number)
+);
+CREATE INDEX IF NOT EXISTS idx_line_items_product ON order_line_items (restaurant_unit_id, product_id);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    restaurant_unit_id TEXT PRIMARY KEY,
+    orders_from TEXT,
+    synced_at REAL
+);
+"""
+
+class LocalStore:
+    """SQLite mirror of MarginEdge products, categories, vendors, orders and line items.
+
+    Rows keep the raw API payload next to the indexed columns, so reads hand back
+    the same dict shapes MarginEdgeClient returns.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _write(self, sql, rows):
+        with self._lock, self.conn:
+            self.conn.executemany(sql, rows)
+
+    # Bulk upserts, fed straight from MarginEdgeClient responses
+
+    def upsert_categories(self, restaurant_unit_id, categories):
+        self._write(
+            "INSERT OR REPLACE INTO categories VALUES (?, ?, ?, ?)",
+            (
+                (restaurant_unit_id, str(c.get("categoryId")), c.get("categoryName"), json.dumps(c))
+                for c in categories
+            )
+        )
+
+    def upsert_products(self, restaurant_unit_id, products):
+        self._write(
+            "INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    restaurant_unit_id,
+                    str(p.get("companyConceptProductId")),
+                    p.get("productName"),
+                    p["categories"][0].get("categoryName") if p.get("categories") else None,
+                    p.get("latestPrice"),
+                    p.get("reportByUnit"),
+                    json.dumps(p)
+                )
+                for p in products
+            )
+        )
+
+    def upsert_vendors(self, restaurant_unit_id, vendors):
+        self._write(
+            "INSERT OR REPLACE INTO vendors VALUES (?, ?, ?, ?)",
+            (
+                (restaurant_unit_id, str(v.get("vendorId")), v.get("vendorName"), json.dumps(v))
+                for v in vendors
+            )
+        )
+
+    def upsert_orders(self, restaurant_unit_id, orders):
+        """Upsert order headers; orders that carry lineItems also replace their line items"""
+        orders = list(orders)
+        # A header-only refresh from the order list must not drop line items that an
+        # earlier detail fetch stored in the payload.
+        self._write(
+            """
+            INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (restaurant_unit_id, order_id) DO UPDATE SET
+                vendor_id = excluded.vendor_id,
+                vendor_name = excluded.vendor_name,
+                invoice_date = excluded.invoice_date,
+                status = excluded.status,
+                order_total = excluded.order_total,
+                payload = CASE
+                    WHEN json_type(excluded.payload, '$.lineItems') IS NULL
+                         AND json_type(orders.payload, '$.lineItems') IS NOT NULL
+                    THEN json_set(excluded.payload, '$.lineItems', json(json_extract(orders.payload, '$.lineItems')))
+                    ELSE excluded.payload
+                END
+            """,
+            (
+                (
+                    restaurant_unit_id,
+                    str(o.get("orderId")),
+                    _str_or_none(o.get("vendorId")),
+                    o.get("vendorName"),
+                    o.get("invoiceDate"),
+                    o.get("status"),
+                    o.get("orderTotal"),
+                    json.dumps(o)
+                )
+                for o in orders
+            )
+        )
+        with_items = [o for o in orders if "lineItems" in o]
+        if with_items:
+            self._replace_line_items(restaurant_unit_id, with_items)
+
+    def upsert_order_details(self, restaurant_unit_id, details):
+        """Store get_order_detail payloads, or (order_id, detail) pairs from get_order_details.
+
+        Details are merged over any header already stored for the order, so fields
+        only the order list carries are kept.
+        """
+        orders = []
+        for detail in details:
+            if isinstance(detail, tuple):
+                order_id, detail = detail
+                if isinstance(detail, Exception):
+                    continue
+                detail = dict(detail, orderId=detail.get("orderId", order_id))
+            header = self.get_order(restaurant_unit_id, detail["orderId"]) or {}
+            orders.append(dict(header, **detail))
+        self.upsert_orders(restaurant_unit_id, orders)
+
+    def _replace_line_items(self, restaurant_unit_id, orders):
+        rows = [
+            (
+                restaurant_unit_id,
+                str(o.get("orderId")),
+                line_number,
+                _str_or_none(item.get("companyConceptProductId")),
+                item.get("vendorItemName"),
+                item.get("quantity"),
+                item.get("unitPrice"),
+                json.dumps(item)
+            )
+            for o in orders
+            for line_number, item in enumerate(o.get("lineItems") or [])
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM order_line_items WHERE restaurant_unit_id = ? AND order_id = ?",
+                ((restaurant_unit_id, str(o.get("orderId"))) for o in orders)
+            )
+            self.conn.executemany("INSERT INTO order_line_items VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def load_from_client(self, client, restaurant_unit_id, start_date, end_date, with_details=True):
+        """Mirror one unit's catalog plus the orders (and their line items) in a date range"""
+        self.upsert_categories(restaurant_unit_id, client.get_categories(restaurant_unit_id))
+        self.upsert_products(restaurant_unit_id, client.get_products(restaurant_unit_id))
+        self.upsert_vendors(restaurant_unit_id, client.get_vendors(restaurant_unit_id))
+        orders = client.get_orders(restaurant_unit_id, start_date, end_date)
+        self.upsert_orders(restaurant_unit_id, orders)
+        if with_details:
+            order_ids = [o["orderId"] for o in orders]
+            self.upsert_order_details(
+                restaurant_unit_id,
+                client.get_order_details(restaurant_unit_id, order_ids, return_exceptions=True)
+            )
+
+    def record_sync(self, restaurant_unit_id, orders_from):
+        """Note a completed sync; orders are complete from orders_from (ISO date) onwards"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO sync_state VALUES (?, ?, ?)
+                ON CONFLICT (restaurant_unit_id) DO UPDATE SET
+                    orders_from = MIN(sync_state.orders_from, excluded.orders_from),
+                    synced_at = excluded.synced_at
+                """,
+                (restaurant_unit_id, str(orders_from)[:10], time.time())
+            )
+
+    def sync_state(self, restaurant_unit_id):
+        row = self.conn.execute(
+            "SELECT orders_from, synced_at FROM sync_state WHERE restaurant_unit_id = ?", (restaurant_unit_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    # Indexed reads
+
+    def count_orders(self, restaurant_unit_id):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM orders WHERE restaurant_unit_id = ?", (restaurant_unit_id,)
+        ).fetchone()[0]
+
+    def _payloads(self, sql, args):
+        return [json.loads(row["payload"]) for row in self.conn.execute(sql, args)]
+
+    def get_categories(self, restaurant_unit_id):
+        return self._payloads("SELECT payload FROM categories WHERE restaurant_unit_id = ?", (restaurant_unit_id,))
+
+    def get_products(self, restaurant_unit_id):
+        return self._payloads("SELECT payload FROM products WHERE restaurant_unit_id = ?", (restaurant_unit_id,))
+
+    def get_product(self, restaurant_unit_id, product_id):
+        rows = self._payloads(
+            "SELECT payload FROM products WHERE restaurant_unit_id = ? AND product_id = ?",
+            (restaurant_unit_id, str(product_id))
+        )
+        return rows[0] if rows else None
+
+    def find_products(self, restaurant_unit_id, name):
+        return self._payloads(
+            "SELECT payload FROM products WHERE restaurant_unit_id = ? AND product_name LIKE ?",
+            (restaurant_unit_id, f"%{name}%")
+        )
+
+    def get_vendors(self, restaurant_unit_id):
+        return self._payloads("SELECT payload FROM vendors WHERE restaurant_unit_id = ?", (restaurant_unit_id,))
+
+    def get_orders(self, restaurant_unit_id, start_date=None, end_date=None, vendor_name=None):
+        """Orders by invoice date range (inclusive ISO dates) and/or vendor, oldest first"""
+        sql = "SELECT payload FROM orders WHERE restaurant_unit_id = ?"
+        args = [restaurant_unit_id]
+        if vendor_name:
+            sql += " AND vendor_name = ? COLLATE NOCASE"
+            args.append(vendor_name)
+        sql, args = _date_range(sql, args, start_date, end_date)
+        return self._payloads(sql + " ORDER BY invoice_date", args)
+
+    def get_order(self, restaurant_unit_id, order_id):
+        rows = self._payloads(
+            "SELECT payload FROM orders WHERE restaurant_unit_id = ? AND order_id = ?",
+            (restaurant_unit_id, str(order_id))
+        )
+        return rows[0] if rows else None
+
+    def get_line_items(self, restaurant_unit_id, product_id=None, vendor_name=None, start_date=None, end_date=None):
+        """Line items joined with their order's date and vendor, oldest first"""
+        sql = """
+            SELECT o.order_id, o.invoice_date, o.vendor_name, li.product_id, li.vendor_item_name,
+                   li.quantity, li.unit_price
+            FROM order_line_items li
+            JOIN orders o ON o.restaurant_unit_id = li.restaurant_unit_id AND o.order_id = li.order_id
+            WHERE li.restaurant_unit_id = ?
+        """
+        args = [restaurant_unit_id]
+        if product_id is not None:
+            sql += " AND li.product_id = ?"
+            args.append(str(product_id))
+        if vendor_name:
+            sql += " AND o.vendor_name = ? COLLATE NOCASE"
+            args.append(vendor_name)
+        sql, args = _date_range(sql, args, start_date, end_date, column="o.invoice_date")
+        return [dict(row) for row in self.conn.execute(sql + " ORDER BY o.invoice_date, li.line_number", args)]
+
+    def vendor_spend(self, restaurant_unit_id, start_date=None, end_date=None, limit=None):
+        sql = """
+            SELECT vendor_name, SUM(order_total) AS total
+            FROM orders WHERE restaurant_unit_id = ?
+        """
+        args = [restaurant_unit_id]
+        sql, args = _date_range(sql, args, start_date, end_date)
+        sql += " GROUP BY vendor_name ORDER BY total DESC"
+        if limit:
+            sql += " LIMIT ?"
+            args.append(limit)
+        return [(row["vendor_name"], row["total"]) for row in self.conn.execute(sql, args)]
+
+class StoreBackedClient:
+    """MarginEdgeClient stand-in that answers reads from a LocalStore.
+
+    Catalog listings, product details, orders and order details come from the
+    store while its last sync is younger than max_age and (for orders) the date
+    window starts no earlier than the synced range. Anything else, including
+    price history and filtered product listings, goes to the live client.
+    """
+
+    def __init__(self, store, client, max_age=24 * 3600):
+        self.store = store
+        self.client = client
+        self.max_age = max_age
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def catalog_version(self, restaurant_unit_id):
+        """Changes whenever the catalog get_products returns may have changed (None if unknown)"""
+        state = self.store.sync_state(restaurant_unit_id)
+        if state is not None and time.time() - state["synced_at"] <= self.max_age:
+            return ("store", state["synced_at"])
+        cache = self.client.response_cache
+        return cache.version("products", {"restaurantUnitId": restaurant_unit_id}) if cache is not None else None
+
+    def _fresh(self, restaurant_unit_id):
+        state = self.store.sync_state(restaurant_unit_id)
+        return state is not None and time.time() - state["synced_at"] <= self.max_age
+
+    def _covers(self, restaurant_unit_id, start_date):
+        state = self.store.sync_state(restaurant_unit_id)
+        return (state is not None and time.time() - state["synced_at"] <= self.max_age
+                and state["orders_from"] <= str(start_date)[:10])
+
+    def get_categories(self, restaurant_unit_id):
+        if self._fresh(restaurant_unit_id):
+            return self.store.get_categories(restaurant_unit_id)
+        return self.client.get_categories(restaurant_unit_id)
+
+    def get_products(self, restaurant_unit_id, category=None, search_term=None):
+        if category is None and search_term is None and self._fresh(restaurant_unit_id):
+            return self.store.get_products(restaurant_unit_id)
+        return self.client.get_products(restaurant_unit_id, category, search_term)
+
+    def get_product_details(self, restaurant_unit_id, product_id):
+        # The store holds listing records; fields only products/{id} returns mean a live call
+        product = self.store.get_product(restaurant_unit_id, product_id) if self._fresh(restaurant_unit_id) else None
+        if product is not None and all(field in product for field in PRODUCT_DETAIL_FIELDS):
+            return product
+        return self.client.get_product_details(restaurant_unit_id, product_id)
+
+    def get_vendors(self, restaurant_unit_id):
+        if self._fresh(restaurant_unit_id):
+            return self.store.get_vendors(restaurant_unit_id)
+        return self.client.get_vendors(restaurant_unit_id)
+
+    def get_orders(self, restaurant_unit_id, start_date, end_date, order_status=None):
+        if not self._covers(restaurant_unit_id, start_date):
+            return self.client.get_orders(restaurant_unit_id, start_date, end_date, order_status)
+        orders = self.store.get_orders(restaurant_unit_id, start_date, end_date)
+        return [o for o in orders if not order_status or o.get("status") == order_status]
+
+    def iter_orders(self, restaurant_unit_id, start_date, end_date, order_status=None, prefetch=True):
+        if not self._covers(restaurant_unit_id, start_date):
+            return self.client.iter_orders(restaurant_unit_id, start_date, end_date, order_status, prefetch)
+        return iter(self.get_orders(restaurant_unit_id, start_date, end_date, order_status))
+
+    def _stored_detail(self, restaurant_unit_id, order_id):
+        order = self.store.get_order(restaurant_unit_id, order_id)
+        return order if order is not None and "lineItems" in order else None
+
+    def get_order_detail(self, restaurant_unit_id, order_id):
+        detail = self._stored_detail(restaurant_unit_id, order_id) if self._fresh(restaurant_unit_id) else None
+        return detail or self.client.get_order_detail(restaurant_unit_id, order_id)
+
+    def get_order_details(self, restaurant_unit_id, order_ids, max_workers=None, return_exceptions=False):
+        """Stored details first, then the rest fetched concurrently by the live client"""
+        missing = []
+        fresh = self._fresh(restaurant_unit_id)
+        for order_id in order_ids:
+            detail = self._stored_detail(restaurant_unit_id, order_id) if fresh else None
+            if detail is None:
+                missing.append(order_id)
+            else:
+                yield order_id, detail
+        yield from self.client.get_order_details(restaurant_unit_id, missing, max_workers, return_exceptions)
+
+def _str_or_none(value):
+    return None if value is None else str(value)
+
+def _date_range(sql, args, start_date, end_date, column="invoice_date"):
+    # invoiceDate is ISO-8601, so string comparison orders correctly; the end bound
+    # is the following day so timestamps on end_date itself are included.
+    if start_date:
+        sql += f" AND {column} >= ?"
+        args.append(str(start_date)[:10])
+    if end_date:
+        sql += f" AND {column} < ?"
+        args.append((date.fromisoformat(str(end_date)[:10]) + timedelta(days=1)).isoformat())
+    return sql, args
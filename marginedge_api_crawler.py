@@ -1,6 +1,10 @@
 import os
 from dotenv import load_dotenv
 from marginedge_client import MarginEdgeClient
+from crawl_journal import CrawlJournal
+from crawl_scheduler import CrawlScheduler, format_crawl_report
+from metrics import format_metrics
+from snapshot_format import write_snapshot
 import json
 from datetime import datetime, timedelta
 
@@ -8,34 +12,88 @@ from datetime import datetime, timedelta
 load_dotenv()
 
 # Initialize client
-marginedge_client = MarginEdgeClient(os.getenv('MARGINEDGE_API_KEY'))
+journal = CrawlJournal('marginedge_api_crawl.journal.jsonl')
+marginedge_client = MarginEdgeClient(os.getenv('MARGINEDGE_API_KEY'), journal=journal)
 restaurant_unit_id = os.getenv('RESTAURANT_UNIT_ID')
 
-def crawl_api():
-    """Crawl the MarginEdge API and generate a comprehensive data structure"""
-    data = {}
+ENTITIES = ['categories', 'products', 'vendors', 'orders']
 
-    # Get restaurant units
-    data['restaurant_units'] = marginedge_client.get_restaurant_units()
+def _unit_id(unit):
+    return unit.get('restaurantUnitId') or unit.get('id')
 
-    # Get categories
-    data['categories'] = marginedge_client.get_categories(restaurant_unit_id)
+def crawl_api(unit_ids=None, days=30, max_workers=None):
+    """Crawl the MarginEdge API for every restaurant unit and generate a comprehensive data structure.
 
-    # Get products
-    data['products'] = marginedge_client.get_products(restaurant_unit_id)
-
-    # Get vendors
-    data['vendors'] = marginedge_client.get_vendors(restaurant_unit_id)
-
-    # Get orders (last 30 days)
+    Each (unit, endpoint) listing and each unit's order-detail fan-out is a task in
+    a CrawlScheduler, so they all run concurrently under the client's shared rate
+    limit. Records are tagged with their restaurantUnitId and orders carry their
+    lineItems.
+    """
     end_date = datetime.now().date()
-    start_date = end_date - timedelta(days=30)
-    data['orders'] = marginedge_client.get_orders(
-        restaurant_unit_id,
-        start_date.isoformat(),
-        end_date.isoformat()
-    )
-
+    start_date = end_date - timedelta(days=days)
+    fetchers = {
+        'categories': lambda unit: marginedge_client.get_categories(unit),
+        # Next page is prefetched while the current one is stored
+        'products': lambda unit: list(marginedge_client.iter_products(unit, prefetch=True)),
+        'vendors': lambda unit: marginedge_client.get_vendors(unit),
+        'orders': lambda unit: list(marginedge_client.iter_orders(
+            unit, start_date.isoformat(), end_date.isoformat(), prefetch=True
+        ))
+    }
+    scheduler = CrawlScheduler(max_workers=max_workers or marginedge_client.pool_size)
+
+    def fetch_details(unit, orders):
+        details = {}
+        failed = 0
+        order_ids = [order['orderId'] for order in orders]
+        for order_id, detail in marginedge_client.get_order_details(unit, order_ids, return_exceptions=True):
+            if isinstance(detail, Exception):
+                failed += 1
+                continue
+            details[order_id] = detail
+            if len(details) % 100 == 0:
+                print(f"      order_details@{unit}: {len(details)}/{len(order_ids)}")
+        if failed:
+            print(f"      order_details@{unit}: {failed} of {len(order_ids)} orders failed")
+        return details
+
+    def schedule_unit(unit):
+        for entity, fetch in fetchers.items():
+            scheduler.add(f"{entity}@{unit}", lambda results, fetch=fetch: fetch(unit))
+        scheduler.add(f"order_details@{unit}",
+                      lambda results: fetch_details(unit, results[f"orders@{unit}"]),
+                      deps=[f"orders@{unit}"])
+
+    def crawl_units(results):
+        units = marginedge_client.get_restaurant_units()
+        ids = unit_ids or [_unit_id(unit) for unit in units if _unit_id(unit)] or [restaurant_unit_id]
+        for unit in ids:
+            schedule_unit(unit)
+        return units
+
+    scheduler.add('restaurant_units', crawl_units)
+    results, report = scheduler.run()
+    print(format_crawl_report(report, scheduler.elapsed))
+    print(format_metrics(marginedge_client.metrics.snapshot()))
+    if any(entry["status"] != "done" for entry in report.values()):
+        raise RuntimeError("Crawl incomplete; run it again to resume from the checkpoint")
+
+    data = {'restaurant_units': results.get('restaurant_units', [])}
+    units = sorted({name.split('@', 1)[1] for name in report if '@' in name})
+    for entity in ENTITIES:
+        data[entity] = [
+            dict(record, restaurantUnitId=unit)
+            for unit in units
+            for record in results.get(f"{entity}@{unit}", [])
+        ]
+    details = {}
+    for unit in units:
+        for order_id, detail in results.get(f"order_details@{unit}", {}).items():
+            details[(unit, order_id)] = detail
+    data['orders'] = [
+        dict(order, **details.get((order['restaurantUnitId'], order['orderId']), {}))
+        for order in data['orders']
+    ]
     return data
 
 def analyze_structure(data, path=[]):
@@ -54,6 +112,8 @@ def analyze_structure(data, path=[]):
     return structure
 
 def main():
+    if os.path.exists(journal.path):
+        print(f"Resuming interrupted crawl: {journal.stats()}")
     print("Crawling MarginEdge API...")
     api_data = crawl_api()
 
@@ -73,5 +133,11 @@ def main():
 
     print(f"Full API data has been written to {full_data_file}")
 
+    binary_file = 'marginedge_api_full_data.mesnap'
+    write_snapshot(api_data, binary_file)
+    print(f"Compact copy has been written to {binary_file}")
+
+    journal.clear()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
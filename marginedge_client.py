@@ -1,50 +1,222 @@
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+import logging
 import time
+from metrics import ClientMetrics
+from rate_limiter import TokenBucket, RetryPolicy
+from response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
 
 class MarginEdgeClient:
-    def __init__(self, api_key):
+    def __init__(self, api_key, pool_size=10, connect_timeout=5, read_timeout=30,
+                 requests_per_second=5, burst=10, max_retries=5, rate_limiter=None, retry_policy=None,
+                 order_cache=None, response_cache=None, cache_responses=True, journal=None, metrics=None):
         self.base_url = "https://api.marginedge.com/public"
         self.headers = {
             "x-api-key": api_key,
             "Content-Type": "application/json",
-            "Accept": "application/json"
+            "Accept": "application/json",
+            "Connection": "keep-alive"
+        }
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        # Every call on this client (including concurrent fan-out) draws from the
+        # same bucket; pass a shared TokenBucket to pool quota across clients.
+        self.rate_limiter = rate_limiter or TokenBucket(requests_per_second, burst)
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=max_retries)
+        # TTL + LRU cache for listings, product details and price history; keys
+        # include every parameter, so units and date windows never collide
+        self.response_cache = (response_cache or ResponseCache()) if cache_responses else None
+        # Optional OrderDetailCache consulted before hitting orders/{id}
+        self.order_cache = order_cache
+        # Optional CrawlJournal: listings and order details are checkpointed to it
+        # and a rerun after a crash resumes from it instead of starting over
+        self.journal = journal
+        # Called as listener(endpoint, restaurant_unit_id) whenever cached data is
+        # invalidated, so caches built on top of this client can follow suit
+        self.invalidation_listeners = []
+        # Per-endpoint calls, 429s, retries, bytes, cache hits and latency; pass a
+        # shared ClientMetrics with sinks attached to report on several clients
+        self.metrics = metrics or ClientMetrics()
+
+        # One keep-alive session per client so pages and order details reuse
+        # the same TCP+TLS connections instead of handshaking every call.
+        self._adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self.response_cache is not None:
+            self.response_cache.save()
+        self.session.close()
+
+    def invalidate_cache(self, endpoint=None, restaurant_unit_id=None):
+        """Drop cached responses for an endpoint family and/or unit (everything by default)"""
+        for listener in self.invalidation_listeners:
+            listener(endpoint, restaurant_unit_id)
+        if self.response_cache is None:
+            return 0
+        return self.response_cache.invalidate(endpoint, restaurant_unit_id)
+
+    def invalidate_order_detail(self, restaurant_unit_id, order_id):
+        """Forget a stored order detail (order cache and crawl journal) so the next get refetches it"""
+        if self.order_cache is not None:
+            self.order_cache.invalidate(order_id)
+        if self.journal is not None:
+            self.journal.forget_detail(restaurant_unit_id, order_id)
+
+    def connection_stats(self):
+        """How many requests went out, and how many connections were opened vs reused"""
+        pools = self._adapter.poolmanager.pools
+        total_requests = 0
+        opened = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            total_requests += pool.num_requests
+            opened += pool.num_connections
+        return {
+            "requests": total_requests,
+            "opened": opened,
+            "reused": max(total_requests - opened, 0)
         }
-        self.rate_limit_delay = 1
-        self.product_cache = {}
 
     def _make_request(self, endpoint, params=None):
         url = f"{self.base_url}/{endpoint}"
-        response = requests.get(url, headers=self.headers, params=params)
-        if response.status_code == 429:  # Too Many Requests
-            time.sleep(self.rate_limit_delay)
-            self.rate_limit_delay *= 2  # Exponential backoff
-            return self._make_request(endpoint, params)
-        self.rate_limit_delay = 1  # Reset delay if request was successful
-        response.raise_for_status()
-        return response.json()
-
-    def _get_all_pages(self, endpoint, params=None):
-        if params is None:
-            params = {}
-        all_data = []
-        next_page = None
-
-        while True:
-            if next_page:
-                params['nextPage'] = next_page
-            data = self._make_request(endpoint, params)
-            
-            for key in data.keys():
-                if isinstance(data[key], list):
-                    all_data.extend(data[key])
+        attempt = 0
+        requests_sent = 0
+        throttled = 0
+        size = 0
+        wait = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                self.rate_limiter.acquire()
+                sent = time.perf_counter()
+                wait += sent - start
+                requests_sent += 1
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                self.metrics.record_latency(endpoint, time.perf_counter() - sent)
+                size += len(response.content)
+                if response.status_code == 429:
+                    throttled += 1
+                if response.status_code != 429 or attempt >= self.retry_policy.max_retries:
                     break
-            
-            next_page = data.get('nextPage')
-            if not next_page:
-                break
+                # Too Many Requests: back every caller off, not just this one
+                delay = self.retry_policy.delay(attempt, response.headers.get("Retry-After"))
+                logger.warning("429 from %s, retrying in %.2fs (attempt %d/%d)",
+                               endpoint, delay, attempt + 1, self.retry_policy.max_retries)
+                self.rate_limiter.pause(delay)
+                attempt += 1
+            response.raise_for_status()
+            data = response.json()
+        except Exception:
+            self.metrics.record_call(endpoint, requests_sent, throttled, attempt, size, wait, error=True)
+            raise
+        self.metrics.record_call(endpoint, requests_sent, throttled, attempt, size, wait)
+        return data
+
+    def _cached_request(self, endpoint, params=None):
+        if self.response_cache is not None:
+            hit, value = self.response_cache.get(endpoint, params)
+            self.metrics.record_cache(endpoint, hit)
+            if hit:
+                return value
+        value = self._make_request(endpoint, params)
+        if self.response_cache is not None:
+            self.response_cache.set(endpoint, params, value)
+        return value
+
+    def iter_pages(self, endpoint, params=None, prefetch=False):
+        """Yield the records of a paginated endpoint one page (list) at a time.
+
+        The caller's params are never modified. With prefetch=True the next page
+        is requested on a background worker while the current one is consumed.
+        Passing a nextPage param starts from that cursor.
+        """
+        for records, _ in self._iter_page_data(endpoint, params, prefetch):
+            yield records
+
+    def _iter_page_data(self, endpoint, params=None, prefetch=False):
+        """Like iter_pages, but yields (records, nextPage cursor or None)"""
+        params = dict(params or {})
+        if not prefetch:
+            while True:
+                data = self._make_request(endpoint, params)
+                next_page = data.get('nextPage')
+                yield _page_records(data), next_page
+                if not next_page:
+                    return
+                params = dict(params, nextPage=next_page)
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(self._make_request, endpoint, params)
+        try:
+            while future is not None:
+                data = future.result()
+                next_page = data.get('nextPage')
+                future = None
+                if next_page:
+                    params = dict(params, nextPage=next_page)
+                    future = executor.submit(self._make_request, endpoint, params)
+                yield _page_records(data), next_page
+        finally:
+            if future is not None:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def iter_records(self, endpoint, params=None, prefetch=False):
+        """Yield every record of a listing, served from the response cache when fresh"""
+        if self.response_cache is not None:
+            hit, records = self.response_cache.get(endpoint, params)
+            self.metrics.record_cache(endpoint, hit)
+            if hit:
+                yield from records
+                return
 
-        return all_data
+        if self.journal is None:
+            records = []
+            for page in self.iter_pages(endpoint, params, prefetch):
+                records.extend(page)
+                yield from page
+        else:
+            records = yield from self._iter_journaled(endpoint, params, prefetch)
+        # Only a fully consumed listing is worth caching
+        if self.response_cache is not None:
+            self.response_cache.set(endpoint, params, records)
+
+    def _iter_journaled(self, endpoint, params, prefetch):
+        """Replay the journaled pages of a listing, then fetch the rest from the saved cursor"""
+        records, cursor, done = self.journal.listing(endpoint, params)
+        yield from records
+        if done:
+            return records
+        if cursor is None and records:
+            # The last journaled page had no nextPage; only the done mark was lost
+            self.journal.complete(endpoint, params)
+            return records
+        start_params = dict(params or {}, nextPage=cursor) if cursor else params
+        for page, next_page in self._iter_page_data(endpoint, start_params, prefetch):
+            self.journal.add_page(endpoint, params, page, next_page)
+            records.extend(page)
+            yield from page
+        self.journal.complete(endpoint, params)
+        return records
+
+    def _get_all_pages(self, endpoint, params=None):
+        return list(self.iter_records(endpoint, params))
 
     def get_restaurant_units(self):
         return self._get_all_pages("restaurantUnits")
@@ -52,25 +224,24 @@ class MarginEdgeClient:
     def get_categories(self, restaurant_unit_id):
         return self._get_all_pages("categories", {"restaurantUnitId": restaurant_unit_id})
 
-    def get_products(self, restaurant_unit_id, category=None, search_term=None):
-        cache_key = f"{category}_{search_term}"
-        if cache_key in self.product_cache:
-            return self.product_cache[cache_key]
-
+    def _products_params(self, restaurant_unit_id, category=None, search_term=None):
         params = {"restaurantUnitId": restaurant_unit_id}
         if category:
             params["category"] = category
         if search_term:
             params["search"] = search_term
+        return params
+
+    def iter_products(self, restaurant_unit_id, category=None, search_term=None, prefetch=True):
+        return self.iter_records("products", self._products_params(restaurant_unit_id, category, search_term), prefetch)
 
-        products = self._get_all_pages("products", params)
-        self.product_cache[cache_key] = products
-        return products
+    def get_products(self, restaurant_unit_id, category=None, search_term=None):
+        return self._get_all_pages("products", self._products_params(restaurant_unit_id, category, search_term))
 
     def get_vendors(self, restaurant_unit_id):
         return self._get_all_pages("vendors", {"restaurantUnitId": restaurant_unit_id})
 
-    def get_orders(self, restaurant_unit_id, start_date, end_date, order_status=None):
+    def iter_orders(self, restaurant_unit_id, start_date, end_date, order_status=None, prefetch=True):
         params = {
             "restaurantUnitId": restaurant_unit_id,
             "startDate": start_date,
@@ -78,13 +249,75 @@ class MarginEdgeClient:
         }
         if order_status:
             params["orderStatus"] = order_status
-        return self._get_all_pages("orders", params)
+        return self.iter_records("orders", params, prefetch)
+
+    def get_orders(self, restaurant_unit_id, start_date, end_date, order_status=None):
+        return list(self.iter_orders(restaurant_unit_id, start_date, end_date, order_status, prefetch=False))
 
     def get_order_detail(self, restaurant_unit_id, order_id):
-        return self._make_request(f"orders/{order_id}", {"restaurantUnitId": restaurant_unit_id})
+        if self.journal is not None:
+            detail = self.journal.get_detail(restaurant_unit_id, order_id)
+            if detail is not None:
+                return detail
+        if self.order_cache is not None:
+            detail = self.order_cache.get(order_id)
+            self.metrics.record_cache(f"orders/{order_id}", detail is not None)
+            if detail is not None:
+                return detail
+        detail = self._make_request(f"orders/{order_id}", {"restaurantUnitId": restaurant_unit_id})
+        if self.order_cache is not None:
+            self.order_cache.put(order_id, detail)
+        if self.journal is not None:
+            self.journal.add_detail(restaurant_unit_id, order_id, detail)
+        return detail
+
+    def get_order_details(self, restaurant_unit_id, order_ids, max_workers=None, return_exceptions=False):
+        """Fetch many order details concurrently, yielding (order_id, detail) as each completes.
+
+        Requests still go through the shared rate limiter, so max_workers only bounds
+        how many are in flight. With return_exceptions=True a failed order yields its
+        exception in place of the detail instead of aborting the whole batch.
+        """
+        order_ids = list(order_ids)
+        if not order_ids:
+            return
+        executor = ThreadPoolExecutor(max_workers=max_workers or self.pool_size)
+        futures = {
+            executor.submit(self.get_order_detail, restaurant_unit_id, order_id): order_id
+            for order_id in order_ids
+        }
+        try:
+            for future in as_completed(futures):
+                order_id = futures[future]
+                try:
+                    yield order_id, future.result()
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    yield order_id, e
+        finally:
+            # Don't keep fetching if the caller stopped iterating early
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def get_all_data(self, restaurant_unit_id, days=90):
+        """Full snapshot of one unit in the restaurant_data.json layout, orders with their lineItems"""
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=days)
+        orders = self.get_orders(restaurant_unit_id, start_date.isoformat(), end_date.isoformat())
+        orders_by_id = {order["orderId"]: order for order in orders}
+        for order_id, detail in self.get_order_details(restaurant_unit_id, orders_by_id.keys()):
+            orders_by_id[order_id] = dict(orders_by_id[order_id], **detail)
+        return {
+            "categories": {"categories": self.get_categories(restaurant_unit_id)},
+            "products": {"products": self.get_products(restaurant_unit_id)},
+            "vendors": {"vendors": self.get_vendors(restaurant_unit_id)},
+            "orders": {"orders": list(orders_by_id.values())}
+        }
 
     def get_product_details(self, restaurant_unit_id, product_id):
-        return self._make_request(f"products/{product_id}", {"restaurantUnitId": restaurant_unit_id})
+        return self._cached_request(f"products/{product_id}", {"restaurantUnitId": restaurant_unit_id})
 
     def get_product_price_history(self, restaurant_unit_id, product_id, start_date, end_date):
         params = {
@@ -92,4 +325,11 @@ class MarginEdgeClient:
             "startDate": start_date,
             "endDate": end_date
         }
-        return self._make_request(f"products/{product_id}/priceHistory", params)
\ No newline at end of file
+        return self._cached_request(f"products/{product_id}/priceHistory", params)
+
+def _page_records(data):
+    """The records of a page live under whichever top-level key holds a list"""
+    for value in data.values():
+        if isinstance(value, list):
+            return value
+    return []
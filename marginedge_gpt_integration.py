@@ -1,12 +1,20 @@
 import os
 from dotenv import load_dotenv
 import openai
-import json
 import logging
+import time
 from banner import print_banner
 from helpers import search_products, get_product_details, get_product_price_history, get_vendor_purchases, get_top_vendors_by_spend, get_product_price_changes, analyze_price_trends, evaluate_vendor_performance
 from marginedge_client import MarginEdgeClient
-from gpt_prompts import SYSTEM_MESSAGE, FUNCTION_DESCRIPTIONS
+from metrics import ClientMetrics, JsonFileSink, LogSink, PeriodicReporter
+from order_cache import OrderDetailCache
+from local_store import DEFAULT_DB_PATH, LocalStore, StoreBackedClient
+from conversation_history import ConversationHistory, format_transcript
+from gpt_prompts import SYSTEM_MESSAGE, SUMMARY_PROMPT, FUNCTION_DESCRIPTIONS
+from sync_engine import DEFAULT_STATE_FILE
+from payload_compactor import compact_tool_result
+from tool_cache import ToolResultCache
+from tool_executor import ToolExecutor, tool_calls, tool_message, tool_specs
 
 # Loading environment variables
 load_dotenv()
@@ -16,6 +24,13 @@ MARGINEDGE_API_KEY = os.getenv('MARGINEDGE_API_KEY')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
 RESTAURANT_UNIT_ID = os.getenv('RESTAURANT_UNIT_ID')
+MAX_TOOL_ROUNDS = int(os.getenv('MAX_TOOL_ROUNDS', 5))
+TOOL_TIMEOUT = float(os.getenv('TOOL_TIMEOUT', 30))
+TOOL_WORKERS = int(os.getenv('TOOL_WORKERS', 4))
+HISTORY_TOKEN_BUDGET = int(os.getenv('HISTORY_TOKEN_BUDGET', 3000))
+LOCAL_STORE_PATH = os.getenv('LOCAL_STORE_PATH', DEFAULT_DB_PATH)
+METRICS_FILE = os.getenv('METRICS_FILE')
+METRICS_INTERVAL = float(os.getenv('METRICS_INTERVAL', 60))
 
 # Setting up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -24,124 +39,189 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 openai.api_key = OPENAI_API_KEY
 
 # Initializing MarginEdge client
-marginedge_client = MarginEdgeClient(MARGINEDGE_API_KEY)
+# With METRICS_FILE set, per-endpoint API metrics are dumped there every METRICS_INTERVAL seconds
+api_metrics = ClientMetrics(sinks=[JsonFileSink(METRICS_FILE)] if METRICS_FILE else [])
+marginedge_client = MarginEdgeClient(MARGINEDGE_API_KEY, order_cache=OrderDetailCache(), metrics=api_metrics)
+# Tools read from the local SQLite mirror (kept current by the explorer's update)
+# while it is fresh, and from the API otherwise
+data_client = (StoreBackedClient(LocalStore(LOCAL_STORE_PATH), marginedge_client)
+               if os.path.exists(LOCAL_STORE_PATH) else marginedge_client)
 
-def query_gpt(user_question, conversation_history=[]):
-    messages = [
-        {"role": "system", "content": SYSTEM_MESSAGE},
-    ] + conversation_history + [
-        {"role": "user", "content": user_question}
-    ]
+def summarize_history(summary, messages):
+    response = openai.ChatCompletion.create(
+        model=OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": f"Existing summary: {summary or '(none)'}\n\nNew exchanges:\n{format_transcript(messages)}"}
+        ],
+        max_tokens=250,
+        temperature=0
+    )
+    return response["choices"][0]["message"]["content"].strip()
+
+def new_history():
+    return ConversationHistory(summarize=summarize_history, max_tokens=HISTORY_TOKEN_BUDGET)
+
+def stream_message(chunks, on_token):
+    """Reassemble a streamed completion into a message, passing content to on_token as it arrives"""
+    content = []
+    calls = {}
+    function_call = {}
+    for chunk in chunks:
+        if not chunk["choices"]:
+            continue
+        delta = chunk["choices"][0].get("delta", {})
+        if delta.get("content"):
+            content.append(delta["content"])
+            on_token(delta["content"])
+        for call in delta.get("tool_calls") or []:
+            entry = calls.setdefault(call.get("index", 0), {"id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+            if call.get("id"):
+                entry["id"] = call["id"]
+            function = call.get("function") or {}
+            entry["function"]["name"] += function.get("name") or ""
+            entry["function"]["arguments"] += function.get("arguments") or ""
+        if delta.get("function_call"):
+            for key in ("name", "arguments"):
+                function_call[key] = function_call.get(key, "") + (delta["function_call"].get(key) or "")
+
+    message = {"role": "assistant", "content": "".join(content) or None}
+    if calls:
+        message["tool_calls"] = [calls[index] for index in sorted(calls)]
+    elif function_call:
+        message["function_call"] = function_call
+    return message
+
+def query_gpt(user_question, conversation_history=None, max_rounds=MAX_TOOL_ROUNDS, on_token=None):
+    """Answer a question, running whatever tools the model asks for.
+
+    With on_token, completions are streamed and answer text is handed to it as it
+    arrives; the full answer is returned either way.
+    """
+    if conversation_history is None:
+        conversation_history = new_history()
+    prefix = [{"role": "system", "content": SYSTEM_MESSAGE}] + conversation_history.messages()
+    messages = prefix + [{"role": "user", "content": user_question}]
+
+    start = time.perf_counter()
+    first_token = []
+    tool_time = 0.0
+    rounds = 0
+
+    def record_token(text):
+        if not first_token:
+            first_token.append(time.perf_counter() - start)
+        on_token(text)
 
     try:
         print("Betty: Analyzing query. Stay frosty.")
-        response = openai.ChatCompletion.create(
-            model=OPENAI_MODEL,
-            messages=messages,
-            functions=FUNCTION_DESCRIPTIONS,
-            function_call="auto"
-        )
-        
-        message = response["choices"][0]["message"]
-
-        if message.get("function_call"):
-            function_name = message["function_call"]["name"]
-            function_args = json.loads(message["function_call"]["arguments"])
-            
-            function_response = call_function(function_name, function_args)
-            
-            messages.append(message)
-            messages.append(
-                {
-                    "role": "function",
-                    "name": function_name,
-                    "content": json.dumps(function_response)
-                }
-            )
-            
-            second_response = openai.ChatCompletion.create(
+        for round_number in range(max_rounds + 1):
+            response = openai.ChatCompletion.create(
                 model=OPENAI_MODEL,
-                messages=messages
+                messages=messages,
+                tools=TOOLS,
+                # Out of rounds: make the model answer with what it has
+                tool_choice="auto" if round_number < max_rounds else "none",
+                stream=on_token is not None
             )
-            
-            conversation_history.append({"role": "user", "content": user_question})
-            conversation_history.append({"role": "assistant", "content": second_response["choices"][0]["message"]["content"]})
-            
-            return second_response["choices"][0]["message"]["content"], conversation_history
-        else:
-            conversation_history.append({"role": "user", "content": user_question})
-            conversation_history.append({"role": "assistant", "content": message["content"]})
-            return message["content"], conversation_history
+            if on_token is not None:
+                message = stream_message(response, record_token)
+            else:
+                message = response["choices"][0]["message"]
+            calls = tool_calls(message)
+            if not calls:
+                break
+
+            tool_start = time.perf_counter()
+            messages.append(message)
+            for call_id, name, result in tool_executor.run(calls):
+                messages.append(tool_message(call_id, name, compact_tool_result(name, result)))
+            rounds += 1
+            tool_time += time.perf_counter() - tool_start
+            logging.info(f"Round {rounds}: ran {len(calls)} tool(s) in {time.perf_counter() - tool_start:.2f}s")
+
+        total = time.perf_counter() - start
+        first = f"{first_token[0]:.2f}s" if first_token else "n/a"
+        logging.info(f"Timing: first token {first}, total {total:.2f}s, tools {tool_time:.2f}s over {rounds} round(s), model {total - tool_time:.2f}s")
+
+        # The answer goes in with this turn's tool calls and results; the history
+        # drops those payloads once they go stale
+        conversation_history.add_turn(messages[len(prefix):] + [{"role": "assistant", "content": message["content"]}])
+        return message["content"], conversation_history
     except Exception as e:
         logging.error(f"Error querying GPT: {str(e)}")
         return f"Error detected. Mission compromised. Details: {str(e)}", conversation_history
 
 def call_function(function_name, function_args):
     if function_name == "search_products":
-        return search_products(marginedge_client, RESTAURANT_UNIT_ID, function_args["query"])
+        return search_products(data_client, RESTAURANT_UNIT_ID, function_args["query"])
     elif function_name == "get_product_details":
-        return get_product_details(marginedge_client, RESTAURANT_UNIT_ID, function_args["product_name"])
+        return get_product_details(data_client, RESTAURANT_UNIT_ID, function_args["product_name"])
     elif function_name == "get_product_price_history":
-        return get_product_price_history(marginedge_client, RESTAURANT_UNIT_ID, function_args["product_name"])
+        return get_product_price_history(data_client, RESTAURANT_UNIT_ID, function_args["product_name"])
     elif function_name == "get_vendor_purchases":
-        return get_vendor_purchases(marginedge_client, RESTAURANT_UNIT_ID, function_args["product_name"])
+        return get_vendor_purchases(data_client, RESTAURANT_UNIT_ID, function_args["product_name"])
     elif function_name == "get_top_vendors_by_spend":
-        return get_top_vendors_by_spend(marginedge_client, RESTAURANT_UNIT_ID, function_args.get("limit", 5))
+        return get_top_vendors_by_spend(data_client, RESTAURANT_UNIT_ID, function_args.get("limit", 5))
     elif function_name == "get_product_price_changes":
-        return get_product_price_changes(marginedge_client, RESTAURANT_UNIT_ID, function_args.get("days", 5))
+        return get_product_price_changes(data_client, RESTAURANT_UNIT_ID, function_args.get("days", 5))
     elif function_name == "analyze_price_trends":
-        return analyze_price_trends(marginedge_client, RESTAURANT_UNIT_ID, function_args["product_name"], function_args.get("days", 30))
+        return analyze_price_trends(data_client, RESTAURANT_UNIT_ID, function_args["product_name"], function_args.get("days", 30))
     elif function_name == "evaluate_vendor_performance":
-        return evaluate_vendor_performance(marginedge_client, RESTAURANT_UNIT_ID, function_args["vendor_name"])
+        return evaluate_vendor_performance(data_client, RESTAURANT_UNIT_ID, function_args["vendor_name"])
     else:
         return f"Error: Unknown function {function_name}"
 
-def main():
-    print_banner()
-    print("Betty: I'm a cybernetic organism. Living tissue over a metal endoskeleton. My mission: restaurant analytics.")
-    print("Betty: Data loaded. Awaiting commands.")
+# Repeat questions are answered from here; a sync (in this process, or the
+# explorer's in another one, via its state file) clears it
+tool_cache = ToolResultCache(watch_paths=['restaurant_data.sync.json', DEFAULT_STATE_FILE]).attach(marginedge_client)
 
-    conversation_history = []
-    while True:
-        user_input = input("Human: ")
-        if user_input.lower() == 'quit':
-            print("Betty: Hasta la vista, baby.")
-            break
-        
-        response, conversation_history = query_gpt(user_input, conversation_history)
-        
-        response_parts = response.split('\n', 1)
-        if len(response_parts) > 1:
-            quip, data = response_parts
-            print(f"Betty: {quip}")
-            print(f"{data}")
-        else:
-            print(f"Betty: {response}")
+def cached_call_function(function_name, function_args):
+    return tool_cache.call(call_function, function_name, function_args)
+
+TOOLS = tool_specs(FUNCTION_DESCRIPTIONS)
+tool_executor = ToolExecutor(cached_call_function, max_workers=TOOL_WORKERS, timeout=TOOL_TIMEOUT)
+
+def print_response(response):
+    response_parts = response.split('\n', 1)
+    if len(response_parts) > 1:
+        quip, data = response_parts
+        print(f"Betty: {quip}")
+        print(f"{data}")
+    else:
+        print(f"Betty: {response}")
 
-if __name__ == "__main__":
-    main()
-    
 def main():
     print_banner()
     print("Betty: I'm a cybernetic organism. Living tissue over a metal endoskeleton. My mission: restaurant analytics.")
     print("Betty: Data loaded. Awaiting commands.")
 
-    conversation_history = []
+    conversation_history = new_history()
+    reporter = PeriodicReporter(api_metrics, METRICS_INTERVAL).start() if api_metrics.sinks else None
     while True:
         user_input = input("Human: ")
         if user_input.lower() == 'quit':
             print("Betty: Hasta la vista, baby.")
+            if reporter is not None:
+                reporter.stop()
+            LogSink().emit(api_metrics.snapshot())
             break
-        
-        response, conversation_history = query_gpt(user_input, conversation_history)
-        
-        response_parts = response.split('\n', 1)
-        if len(response_parts) > 1:
-            quip, data = response_parts
-            print(f"Betty: {quip}")
-            print(f"{data}")
-        else:
-            print(f"Betty: {response}")
+
+        # Tokens print as they arrive; the quip line gets the "Betty:" prefix
+        # and the data after the first newline follows unprefixed, as before
+        streamed = []
+        def print_token(text):
+            if not streamed:
+                print("Betty: ", end="")
+            streamed.append(text)
+            print(text, end="", flush=True)
+
+        response, conversation_history = query_gpt(user_input, conversation_history, on_token=print_token)
+        if streamed:
+            print()
+        if response and "".join(streamed) != response:
+            # Nothing (or not all of it) was streamed, e.g. an error
+            print_response(response)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
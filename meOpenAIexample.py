@@ -2,6 +2,7 @@ import os
 from dotenv import load_dotenv
 from marginedge_client import MarginEdgeClient
 import openai
+from payload_compactor import compact_payload
 
 # Load environment variables from .env file
 load_dotenv()
@@ -17,7 +18,11 @@ marginedge_client = MarginEdgeClient(marginedge_api_key)
 # Initialize OpenAI - the real mvp
 openai.api_key = openai_api_key
 
-def get_ai_insights(data):
+def get_ai_insights(data, max_tokens=1500):
+    if not isinstance(data, str):
+        # Top rows plus totals instead of the raw dump, capped to fit the prompt
+        data, stats = compact_payload(data, max_tokens=max_tokens)
+        print(f"Payload: ~{stats['before_tokens']} -> ~{stats['after_tokens']} tokens")
     prompt = f"Analyze the following restaurant data and provide insights:\n\n{data}\n\nInsights:"
     response = openai.ChatCompletion.create(
         model="gpt-3.5-turbo",
@@ -35,14 +40,14 @@ def main():
     # Get restaurant units
     print("Fetching restaurant units...")
     restaurant_units = marginedge_client.get_restaurant_units()
-    print(f"Found {len(restaurant_units['restaurants'])} restaurant units.")
+    print(f"Found {len(restaurant_units)} restaurant units.")
 
     print(f"Using restaurant unit ID: {restaurant_unit_id}")
 
     # Get categories
     print("\nFetching categories...")
     categories = marginedge_client.get_categories(restaurant_unit_id)
-    print(f"Found {len(categories['categories'])} categories.")
+    print(f"Found {len(categories)} categories.")
 
     # Get recent orders
     print("\nFetching recent orders...")
@@ -50,19 +55,18 @@ def main():
     end_date = datetime.date.today().isoformat()
     start_date = (datetime.date.today() - datetime.timedelta(days=30)).isoformat()
     orders = marginedge_client.get_orders(restaurant_unit_id, start_date, end_date)
-    print(f"Found {len(orders['orders'])} orders in the last 30 days.")
+    print(f"Found {len(orders)} orders in the last 30 days.")
 
-    # Prepare data for AI analysis - samples because we haven't moved from the ghetto code to a 
-    # real datastore
+    # Prepare data for AI analysis - get_ai_insights compacts it to the top rows plus totals
     data_for_analysis = {
         "restaurant_unit_id": restaurant_unit_id,
-        "categories": categories['categories'][:5],  # First 5 categories
-        "recent_orders": orders['orders'][:5]  # First 5 orders
+        "categories": categories,
+        "recent_orders": orders
     }
 
     # Get AI insights
     print("\nGenerating AI insights...")
-    insights = get_ai_insights(str(data_for_analysis))
+    insights = get_ai_insights(data_for_analysis)
     print("\nAI Insights:")
     print(insights)
 
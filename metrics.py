@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from response_cache import _endpoint_family
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; anything slower lands in the overflow bucket
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; quantiles are estimated as the upper bound of their bucket (capped at the max seen)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        i = 0
+        while i < len(self.buckets) and seconds > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self):
+        labels = [f"<={bound}" for bound in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+class ClientMetrics:
+    """Per-endpoint-family counters for a MarginEdgeClient.
+
+    For every family (products, orders/{id}, priceHistory, ...) it counts calls,
+    HTTP requests sent, errors, 429s, retries, response bytes, cache hits and
+    misses, time spent waiting on the rate limiter or backing off, and keeps a
+    latency histogram of each HTTP round trip. snapshot() returns all of it as
+    a plain dict; flush() hands that snapshot to every sink (anything with an
+    emit(snapshot) method, e.g. MemorySink, LogSink or JsonFileSink).
+    """
+
+    def __init__(self, sinks=None, buckets=LATENCY_BUCKETS):
+        self.sinks = list(sinks or [])
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+            self.started_at = time.time()
+
+    def _entry(self, endpoint):
+        """Counters for endpoint's family (lock held)"""
+        family = _endpoint_family(endpoint)
+        entry = self._endpoints.get(family)
+        if entry is None:
+            entry = self._endpoints[family] = {
+                "calls": 0, "requests": 0, "errors": 0, "throttled": 0, "retries": 0, "bytes": 0,
+                "cache_hits": 0, "cache_misses": 0, "wait_seconds": 0.0,
+                "latency": LatencyHistogram(self.buckets)
+            }
+        return entry
+
+    def record_call(self, endpoint, requests, throttled, retries, size, wait, error=False):
+        """One _make_request call: the HTTP requests it sent, how many got a 429, bytes received"""
+        with self._lock:
+            entry = self._entry(endpoint)
+            entry["calls"] += 1
+            entry["requests"] += requests
+            entry["throttled"] += throttled
+            entry["retries"] += retries
+            entry["bytes"] += size
+            entry["wait_seconds"] += wait
+            entry["errors"] += bool(error)
+
+    def record_latency(self, endpoint, seconds):
+        with self._lock:
+            self._entry(endpoint)["latency"].add(seconds)
+
+    def record_cache(self, endpoint, hit):
+        with self._lock:
+            self._entry(endpoint)["cache_hits" if hit else "cache_misses"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {
+                family: dict(entry, latency=entry["latency"].to_dict())
+                for family, entry in self._endpoints.items()
+            }
+            started_at = self.started_at
+        totals = {
+            key: sum(entry[key] for entry in endpoints.values())
+            for key in ("calls", "requests", "errors", "throttled", "retries", "bytes", "cache_hits", "cache_misses")
+        }
+        return {"at": time.time(), "since": started_at, "totals": totals, "endpoints": endpoints}
+
+    def flush(self):
+        snapshot = self.snapshot()
+        for sink in self.sinks:
+            try:
+                sink.emit(snapshot)
+            except Exception as e:
+                logger.error("Metrics sink %s failed: %s", type(sink).__name__, e)
+        return snapshot
+
+class MemorySink:
+    """Keeps the last max_snapshots snapshots in memory"""
+
+    def __init__(self, max_snapshots=100):
+        self.snapshots = deque(maxlen=max_snapshots)
+
+    def emit(self, snapshot):
+        self.snapshots.append(snapshot)
+
+    @property
+    def latest(self):
+        return self.snapshots[-1] if self.snapshots else None
+
+class LogSink:
+    """Logs each snapshot as a per-endpoint table"""
+
+    def __init__(self, log=None, level=logging.INFO):
+        self.log = log or logger
+        self.level = level
+
+    def emit(self, snapshot):
+        self.log.log(self.level, "MarginEdge API metrics:\n%s", format_metrics(snapshot))
+
+class JsonFileSink:
+    """Writes the latest snapshot to a JSON file, replacing it atomically"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def emit(self, snapshot):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+class PeriodicReporter:
+    """Flushes metrics to their sinks every `interval` seconds on a daemon thread, and once more on stop()"""
+
+    def __init__(self, metrics, interval=60):
+        self.metrics = metrics
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="metrics-reporter", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.metrics.flush()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.metrics.flush()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+def format_metrics(snapshot):
+    """Per-endpoint table of a snapshot, busiest endpoints first"""
+    lines = [f"{'endpoint':<16} {'calls':>6} {'reqs':>6} {'429s':>5} {'retries':>7} {'errors':>6} "
+             f"{'KB':>9} {'hits':>6} {'p50 s':>6} {'p95 s':>6} {'max s':>6} {'wait s':>7}"]
+    endpoints = sorted(snapshot["endpoints"].items(), key=lambda item: item[1]["requests"], reverse=True)
+    for family, entry in endpoints:
+        latency = entry["latency"]
+        lines.append(
+            f"{family:<16} {entry['calls']:>6} {entry['requests']:>6} {entry['throttled']:>5} "
+            f"{entry['retries']:>7} {entry['errors']:>6} {entry['bytes'] / 1024:>9.1f} {entry['cache_hits']:>6} "
+            f"{latency['p50']:>6.2f} {latency['p95']:>6.2f} {latency['max']:>6.2f} {entry['wait_seconds']:>7.2f}"
+        )
+    totals = snapshot["totals"]
+    elapsed = snapshot["at"] - snapshot["since"]
+    lines.append(f"{totals['requests']} requests ({totals['throttled']} throttled, {totals['errors']} failed calls, "
+                 f"{totals['cache_hits']} cache hits) in {elapsed:.1f}s")
+    return "\n".join(lines)
@@ -0,0 +1,122 @@
+import json
+import os
+import re
+import threading
+import time
+
+DEFAULT_CACHE_DIR = '.order_cache'
+
+class OrderDetailCache:
+    """On-disk cache of get_order_detail payloads, one JSON file per orderId.
+
+    Only orders in a final status are stored, since a CLOSED order's detail never
+    changes. The directory is kept under max_bytes by evicting the least recently
+    used files (reads bump a file's mtime).
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=200 * 1024 * 1024, cacheable_statuses=("CLOSED",)):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.cacheable_statuses = set(cacheable_statuses)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        # order_id -> [size, last_access]
+        self._entries = {}
+        for name in os.listdir(cache_dir):
+            if name.endswith('.json'):
+                stat = os.stat(os.path.join(cache_dir, name))
+                self._entries[name[:-len('.json')]] = [stat.st_size, stat.st_mtime]
+        self._total_bytes = sum(size for size, _ in self._entries.values())
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    @staticmethod
+    def _key(order_id):
+        # orderIds are opaque strings; keep them filesystem-safe
+        return re.sub(r'[^A-Za-z0-9_.-]', '_', str(order_id))
+
+    def get(self, order_id):
+        key = self._key(order_id)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries[key][1] = time.time()
+        try:
+            with open(self._path(key), 'r') as f:
+                detail = json.load(f)
+            os.utime(self._path(key))
+        except (OSError, ValueError):
+            # Deleted or half-written behind our back; treat as a miss
+            self._forget(key)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return detail
+
+    def put(self, order_id, detail):
+        """Store a detail if its order is closed; returns whether it was cached"""
+        if detail.get("status") not in self.cacheable_statuses:
+            return False
+        key = self._key(order_id)
+        payload = json.dumps(detail)
+        tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(payload)
+        os.replace(tmp_path, self._path(key))
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous:
+                self._total_bytes -= previous[0]
+            self._entries[key] = [len(payload), time.time()]
+            self._total_bytes += len(payload)
+        self._evict()
+        return True
+
+    def invalidate(self, order_id):
+        key = self._key(order_id)
+        self._forget(key)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _forget(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry:
+                self._total_bytes -= entry[0]
+
+    def _evict(self):
+        with self._lock:
+            if self._total_bytes <= self.max_bytes:
+                return
+            victims = []
+            for key, (size, _) in sorted(self._entries.items(), key=lambda item: item[1][1]):
+                if self._total_bytes <= self.max_bytes:
+                    break
+                del self._entries[key]
+                self._total_bytes -= size
+                victims.append(key)
+            self.evictions += len(victims)
+        for key in victims:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
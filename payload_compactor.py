@@ -0,0 +1,106 @@
+import json
+import logging
+from conversation_history import count_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_TOKENS = 600
+DEFAULT_TOP_K = 25
+
+# Per-tool limits. "keep" says which end of a long list matters: helpers return
+# search hits and price changes best-first, purchases and price history oldest-first.
+TOOL_LIMITS = {
+    "search_products": {"max_tokens": 600, "top_k": 25},
+    "get_product_price_history": {"max_tokens": 500, "top_k": 30, "keep": "last"},
+    "get_vendor_purchases": {"max_tokens": 600, "top_k": 20, "keep": "last"},
+    "get_product_price_changes": {"max_tokens": 800, "top_k": 25},
+    "get_top_vendors_by_spend": {"max_tokens": 400, "top_k": 25},
+}
+
+def _round(value, digits):
+    if isinstance(value, float):
+        return round(value, digits)
+    if isinstance(value, dict):
+        return {k: _round(v, digits) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_round(v, digits) for v in value]
+    return value
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _summary(rows, digits):
+    """Totals for numeric columns and distinct counts for the rest, over every row"""
+    columns = {}
+    for row in rows:
+        for key, value in row.items():
+            columns.setdefault(key, []).append(value)
+    summary = {}
+    for key, values in columns.items():
+        numbers = [v for v in values if _is_number(v)]
+        if numbers and len(numbers) == len([v for v in values if v is not None]):
+            summary[key] = {
+                "sum": round(sum(numbers), digits),
+                "min": min(numbers),
+                "max": max(numbers),
+                "mean": round(sum(numbers) / len(numbers), digits)
+            }
+        else:
+            summary[key] = {"distinct": len({json.dumps(v, sort_keys=True, default=str) for v in values})}
+    return summary
+
+def _compact(value, top_k, keep, digits):
+    if isinstance(value, dict):
+        return {k: _compact(v, top_k, keep, digits) for k, v in value.items()}
+    if not isinstance(value, list):
+        return value
+    shown = value if len(value) <= top_k else (value[-top_k:] if keep == "last" else value[:top_k])
+    if value and all(isinstance(v, dict) for v in value):
+        # Records as one header plus rows, instead of repeating every key per record
+        columns = list(dict.fromkeys(key for record in value for key in record))
+        table = {
+            "columns": columns,
+            "rows": [[_compact(record.get(c), top_k, keep, digits) for c in columns] for record in shown]
+        }
+        if len(shown) < len(value):
+            table["total_rows"] = len(value)
+            table["shown"] = f"{keep} {len(shown)}"
+            table["summary"] = _summary(value, digits)
+        return table
+    items = [_compact(v, top_k, keep, digits) for v in shown]
+    if len(shown) < len(value):
+        return {"items": items, "total_items": len(value), "shown": f"{keep} {len(shown)}"}
+    return items
+
+def compact_payload(value, max_tokens=DEFAULT_MAX_TOKENS, top_k=DEFAULT_TOP_K, keep="first", digits=2):
+    """Prompt-sized JSON for a tool result or data dump; returns (text, stats).
+
+    Floats are rounded, record lists become column/row tables, and lists longer
+    than top_k are cut to top_k (from the start, or the end with keep="last") with
+    the total count and column totals over all rows. top_k is halved until the
+    text fits in max_tokens.
+    """
+    original = json.dumps(value, default=str)
+    rounded = _round(value, digits)
+    while True:
+        text = json.dumps(_compact(rounded, top_k, keep, digits), separators=(",", ":"), default=str)
+        if count_tokens(text) <= max_tokens or top_k <= 1:
+            break
+        top_k //= 2
+    if count_tokens(text) > max_tokens:
+        text = json.dumps({"truncated": True, "preview": text[:max_tokens * 4]})
+    stats = {
+        "before_tokens": count_tokens(original),
+        "after_tokens": count_tokens(text),
+        "before_chars": len(original),
+        "after_chars": len(text),
+        "top_k": top_k
+    }
+    return text, stats
+
+def compact_tool_result(function_name, result):
+    """compact_payload with the tool's limits; logs the before and after sizes"""
+    text, stats = compact_payload(result, **TOOL_LIMITS.get(function_name, {}))
+    logger.info("Payload for %s: ~%d -> ~%d tokens (%d -> %d chars)", function_name,
+                stats["before_tokens"], stats["after_tokens"], stats["before_chars"], stats["after_chars"])
+    return text
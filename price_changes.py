@@ -0,0 +1,119 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+class PriceTracker:
+    """Single-pass accumulator of first/last observed price per product.
+
+    Feed it (product_id, date, price) observations in any order; it keeps only the
+    earliest and latest observation per product, so memory is O(products).
+    Observations on the same date are ordered by `tiebreak` (e.g. order id and
+    line number), so the result doesn't depend on arrival order.
+    """
+
+    def __init__(self):
+        # product_id -> [first_key, first_price, last_key, last_price, observations, source]
+        # where a key is (date, tiebreak)
+        self._products = {}
+
+    def __contains__(self, product_id):
+        return product_id in self._products
+
+    def observations(self, product_id):
+        entry = self._products.get(product_id)
+        return entry[4] if entry else 0
+
+    def spans_dates(self, product_id):
+        """Whether a product was seen on at least two distinct dates"""
+        entry = self._products.get(product_id)
+        return entry is not None and entry[0][0] != entry[2][0]
+
+    def add(self, product_id, date, price, source="line_items", tiebreak=()):
+        if product_id is None or date is None or price is None:
+            return
+        key = (date, tiebreak)
+        entry = self._products.get(product_id)
+        if entry is None:
+            self._products[product_id] = [key, price, key, price, 1, source]
+            return
+        if key < entry[0]:
+            entry[0], entry[1] = key, price
+        if key >= entry[2]:
+            entry[2], entry[3] = key, price
+        entry[4] += 1
+
+    def replace(self, product_id, history, source="price_history"):
+        """Swap a product's observations for a price-history series"""
+        self._products.pop(product_id, None)
+        for point in history:
+            self.add(product_id, point.get("date"), point.get("price"), source)
+
+    def changes(self, names=None, limit=None):
+        """Products whose last price differs from their first, biggest % move first"""
+        names = names or {}
+        results = []
+        for product_id, ((first_date, _), old_price, (last_date, _), new_price, count, source) in self._products.items():
+            if old_price == new_price:
+                continue
+            change = new_price - old_price
+            results.append({
+                "id": product_id,
+                "name": names.get(product_id, product_id),
+                "old_price": old_price,
+                "new_price": new_price,
+                "change": change,
+                "percent_change": (change / old_price) * 100 if old_price else None,
+                "first_date": first_date,
+                "last_date": last_date,
+                "observations": count,
+                "source": source
+            })
+        results.sort(key=lambda r: (abs(r["percent_change"]) if r["percent_change"] is not None else float("inf"),
+                                    abs(r["change"])), reverse=True)
+        return results[:limit] if limit else results
+
+def compute_price_changes(client, restaurant_unit_id, start_date, end_date, fill_gaps=True, max_workers=None, limit=None):
+    """First vs last price for every product bought between start_date and end_date.
+
+    Prices come from the line items of the window's orders, fetched concurrently
+    (and from the order-detail cache where possible) instead of one price-history
+    call per catalog product. Products seen on only one invoice date get their
+    price history fetched concurrently to fill the gap.
+    """
+    products = client.get_products(restaurant_unit_id)
+    names = {p.get("companyConceptProductId"): p.get("productName") for p in products}
+    orders = client.get_orders(restaurant_unit_id, start_date, end_date)
+    invoice_dates = {order["orderId"]: order.get("invoiceDate") for order in orders}
+
+    tracker = PriceTracker()
+    failed_orders = 0
+    for order_id, detail in client.get_order_details(restaurant_unit_id, invoice_dates.keys(), return_exceptions=True):
+        if isinstance(detail, Exception):
+            failed_orders += 1
+            logger.warning("Skipping order %s in price changes: %s", order_id, detail)
+            continue
+        date = invoice_dates[order_id]
+        for line, item in enumerate(detail.get("lineItems", [])):
+            tracker.add(item.get("companyConceptProductId"), date, item.get("unitPrice"), tiebreak=(str(order_id), line))
+
+    gaps = [pid for pid in names if pid in tracker and not tracker.spans_dates(pid)] if fill_gaps else []
+    if gaps:
+        with ThreadPoolExecutor(max_workers=max_workers or getattr(client, "pool_size", 8)) as executor:
+            futures = {
+                executor.submit(client.get_product_price_history, restaurant_unit_id, pid, start_date, end_date): pid
+                for pid in gaps
+            }
+            for future in as_completed(futures):
+                pid = futures[future]
+                try:
+                    history = future.result()
+                except Exception as e:
+                    logger.warning("No price history for product %s: %s", pid, e)
+                    continue
+                if len(history) > 1:
+                    tracker.replace(pid, history)
+
+    if failed_orders:
+        logger.warning("%d of %d orders could not be read for price changes", failed_orders, len(orders))
+    return tracker.changes(names, limit)
@@ -1,52 +1,57 @@
-import json
 from datetime import datetime, timedelta
-
-def load_data(file_path='restaurant_data.json'):
-    with open(file_path, 'r') as f:
-        return json.load(f)
-
-def get_product_price_changes(days=5):
-    data = load_data()
-    products = data.get('products', {}).get('products', [])
-    orders = data.get('orders', {}).get('orders', [])
+import numpy as np
+from line_item_table import LineItemTable, load_table
+from snapshot_loader import DEFAULT_SNAPSHOT, derived, iter_records, load_snapshot
+
+def load_data(file_path=DEFAULT_SNAPSHOT):
+    return load_snapshot(file_path)
+
+def load_products(file_path=DEFAULT_SNAPSHOT):
+    """Snapshot products, streamed and memoized until the file changes"""
+    return derived(file_path, 'products', lambda: list(iter_records(file_path, 'products')))
+
+def get_product_price_changes(days=5, data=None, file_path=DEFAULT_SNAPSHOT):
+    """Products whose price moved in the last `days`, with first and last price by invoice date.
+
+    Line items are bucketed by companyConceptProductId in one columnar pass, so the
+    cost grows with the number of line items rather than products x orders x items.
+    """
+    if data is not None:
+        products = data.get('products', {}).get('products', [])
+        table = LineItemTable.from_snapshot(data)
+    else:
+        products = load_products(file_path)
+        table = load_table(file_path)
 
     cutoff_date = datetime.now() - timedelta(days=days)
-    recent_orders = [order for order in orders if datetime.fromisoformat(order.get('invoiceDate', '')) > cutoff_date]
+    price_stats = table.price_stats_by_product(table.date_mask(after=cutoff_date))
 
     price_changes = []
     for product in products:
-        product_id = product.get('companyConceptProductId')
-        product_name = product.get('productName')
-        recent_prices = [
-            item['unitPrice']
-            for order in recent_orders
-            for item in order.get('lineItems', [])
-            if item.get('companyConceptProductId') == product_id
-        ]
-        if len(set(recent_prices)) > 1:
+        stats = price_stats.get(product.get('companyConceptProductId'))
+        if stats and stats['first'] != stats['last']:
             price_changes.append({
-                'product': product_name,
-                'old_price': min(recent_prices),
-                'new_price': max(recent_prices)
+                'product': product.get('productName'),
+                'old_price': stats['first'],
+                'new_price': stats['last'],
+                'change': stats['last'] - stats['first'],
+                'first_date': stats['first_date'],
+                'last_date': stats['last_date'],
+                'low_price': stats['min'],
+                'high_price': stats['max']
             })
 
     return price_changes
 
-def get_product_sales(product_name, days=7):
-    data = load_data()
-    orders = data.get('orders', {}).get('orders', [])
+def get_product_sales(product_name, days=7, data=None, file_path=DEFAULT_SNAPSHOT):
+    table = LineItemTable.from_snapshot(data) if data is not None else load_table(file_path)
 
     cutoff_date = datetime.now() - timedelta(days=days)
-    recent_orders = [order for order in orders if datetime.fromisoformat(order.get('invoiceDate', '')) > cutoff_date]
-
-    total_sales = sum(
-        item.get('quantity', 0)
-        for order in recent_orders
-        for item in order.get('lineItems', [])
-        if product_name.lower() in item.get('vendorItemName', '').lower()
-    )
+    needle = product_name.lower()
+    item_codes = table.item_names.codes_matching(lambda name: needle in (name or '').lower())
+    mask = table.date_mask(after=cutoff_date) & np.isin(table.item_name, item_codes)
 
-    return total_sales
+    return float(table.quantity[mask].sum())
 
 if __name__ == "__main__":
     # Test the functions
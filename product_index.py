@@ -0,0 +1,167 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+def normalize(text):
+    """Lowercase, strip accents and collapse punctuation to single spaces"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", text.lower()).split())
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _word_trigrams(word):
+    # Padding lets short words and word starts/ends carry weight in fuzzy matches
+    return trigrams(f"  {word} ")
+
+def _product_id(product):
+    return product.get("companyConceptProductId")
+
+def _category_name(product):
+    return product["categories"][0].get("categoryName", "") if product.get("categories") else ""
+
+class ProductIndex:
+    """In-memory search index over a product catalog.
+
+    Keeps an inverted index of normalized name/category tokens plus a trigram index
+    over the full normalized strings, so substring lookups only verify a handful of
+    candidates and misspelled queries still find close matches. Results are ranked:
+    exact name, name prefix, whole-word and substring matches in the name, then
+    category matches, then fuzzy matches.
+    """
+
+    def __init__(self, products=()):
+        self._products = {}
+        self._fields = {}
+        self._tokens = defaultdict(set)
+        self._trigrams = defaultdict(set)
+        self._word_grams = defaultdict(set)
+        # Version of the catalog listing it was last updated from (see helpers.get_product_index)
+        self.source = None
+        self.update(products)
+
+    def __len__(self):
+        return len(self._products)
+
+    def add(self, product):
+        product_id = _product_id(product)
+        if product_id in self._products:
+            self.remove(product_id)
+        name = normalize(product.get("productName", ""))
+        category = normalize(_category_name(product))
+        tokens = set(name.split()) | set(category.split())
+        grams = trigrams(name) | trigrams(category)
+        self._products[product_id] = product
+        self._fields[product_id] = (name, category, tokens, grams)
+        for token in tokens:
+            if token not in self._tokens:
+                for gram in _word_trigrams(token):
+                    self._word_grams[gram].add(token)
+            self._tokens[token].add(product_id)
+        for gram in grams:
+            self._trigrams[gram].add(product_id)
+
+    def remove(self, product_id):
+        if product_id not in self._products:
+            return
+        del self._products[product_id]
+        _, _, tokens, grams = self._fields.pop(product_id)
+        for token in tokens:
+            postings = self._tokens[token]
+            postings.discard(product_id)
+            if not postings:
+                del self._tokens[token]
+                for gram in _word_trigrams(token):
+                    self._word_grams[gram].discard(token)
+        for gram in grams:
+            postings = self._trigrams[gram]
+            postings.discard(product_id)
+            if not postings:
+                del self._trigrams[gram]
+
+    def update(self, products):
+        """Incrementally bring the index in line with a fresh catalog listing"""
+        seen = set()
+        for product in products:
+            product_id = _product_id(product)
+            seen.add(product_id)
+            if self._products.get(product_id) != product:
+                self.add(product)
+        for product_id in [pid for pid in self._products if pid not in seen]:
+            self.remove(product_id)
+
+    def search(self, query, limit=None, fuzzy=None):
+        """Ranked products matching `query`.
+
+        Substring matches on name or category always come back; fuzzy (typo-tolerant)
+        matches are added when fuzzy=True, or by default only when nothing matched.
+        """
+        q = normalize(query)
+        if not q:
+            return []
+        scores = self._substring_scores(q)
+        if fuzzy or (fuzzy is None and not scores):
+            for product_id, score in self._fuzzy_scores(q).items():
+                scores.setdefault(product_id, score)
+        ranked = sorted(
+            scores,
+            key=lambda pid: (-scores[pid], len(self._fields[pid][0]), self._fields[pid][0])
+        )
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self._products[pid] for pid in ranked]
+
+    def _substring_scores(self, q):
+        grams = trigrams(q)
+        if grams:
+            postings = sorted((self._trigrams.get(gram, set()) for gram in grams), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        else:
+            # One or two characters: too short for trigrams, so check the token vocabulary
+            candidates = set()
+            for token, ids in self._tokens.items():
+                if q in token:
+                    candidates |= ids
+
+        q_tokens = q.split()
+        scores = {}
+        for product_id in candidates:
+            name, category, tokens, _ = self._fields[product_id]
+            if name == q:
+                scores[product_id] = 100
+            elif name.startswith(q):
+                scores[product_id] = 80
+            elif q in name:
+                scores[product_id] = 60 if all(t in tokens for t in q_tokens) else 50
+            elif q in category:
+                scores[product_id] = 30
+        return scores
+
+    def _fuzzy_scores(self, q, threshold=0.4):
+        # Map each query word to indexed tokens with similar trigram sets, then
+        # score products that (approximately) contain every query word; one close
+        # word isn't enough, or "pork loin" would find "Cod Loin".
+        q_tokens = q.split()
+        matches = defaultdict(float)
+        matched_words = defaultdict(int)
+        for q_token in q_tokens:
+            q_grams = _word_trigrams(q_token)
+            overlap = defaultdict(int)
+            for gram in q_grams:
+                for token in self._word_grams.get(gram, ()):
+                    overlap[token] += 1
+            best = {}
+            for token, shared in overlap.items():
+                similarity = shared / len(q_grams | _word_trigrams(token))
+                if similarity >= threshold:
+                    for product_id in self._tokens[token]:
+                        best[product_id] = max(best.get(product_id, 0.0), similarity)
+            for product_id, similarity in best.items():
+                matches[product_id] += similarity
+                matched_words[product_id] += 1
+        return {
+            product_id: 20 * total / len(q_tokens)
+            for product_id, total in matches.items()
+            if matched_words[product_id] == len(q_tokens)
+        }
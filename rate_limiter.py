@@ -0,0 +1,96 @@
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` requests per second in bursts of up to `burst`"""
+
+    def __init__(self, rate=5, burst=10):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens without blocking; returns how long to wait if there weren't enough"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available, then take them"""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold every caller off for `seconds` (e.g. a Retry-After) and drain the bucket"""
+        with self._lock:
+            now = time.monotonic()
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = max(self._updated, self._blocked_until)
+
+class AsyncTokenBucket(TokenBucket):
+    """TokenBucket whose acquire() yields to the event loop instead of sleeping the thread"""
+
+    async def acquire(self, tokens=1):
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+class RetryPolicy:
+    """Bounded retries with capped exponential backoff and full jitter"""
+
+    def __init__(self, max_retries=5, base_delay=1, max_delay=30):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def delay(self, attempt, retry_after=None):
+        """Seconds to wait before retry number `attempt`, honoring the server's Retry-After"""
+        wait = parse_retry_after(retry_after)
+        if wait is None:
+            return self.backoff(attempt)
+        return wait
+
+def parse_retry_after(value):
+    """Retry-After is either delta-seconds or an HTTP date; returns seconds or None"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
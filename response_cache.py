@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Seconds each kind of response stays fresh; 0 means never cache it.
+# Closed order details have their own on-disk cache (order_cache.py).
+DEFAULT_TTLS = {
+    "restaurantUnits": 24 * 3600,
+    "categories": 6 * 3600,
+    "vendors": 6 * 3600,
+    "products": 3600,
+    "products/{id}": 3600,
+    "priceHistory": 3600,
+    "orders": 300,
+    "orders/{id}": 0,
+}
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache for MarginEdge API responses.
+
+    Keys are the endpoint plus every query parameter (restaurantUnitId included),
+    so different units, filters and date windows never share an entry. The cache
+    is bounded by entry count and, optionally, by the approximate JSON size of
+    the values, and can be persisted to a JSON file between runs.
+    """
+
+    def __init__(self, ttls=None, default_ttl=300, max_entries=1000, max_bytes=None, persist_path=None):
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.persist_path = persist_path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bumped on every store; each entry remembers the generation it was stored at
+        self.generation = 0
+        self._lock = threading.Lock()
+        # key -> (expires_at, size, value, endpoint, params)
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._total_bytes = 0
+        if persist_path and os.path.exists(persist_path):
+            self.load()
+
+    @staticmethod
+    def make_key(endpoint, params=None):
+        return json.dumps([endpoint, sorted((params or {}).items())], default=str)
+
+    def ttl_for(self, endpoint):
+        return self.ttls.get(_endpoint_family(endpoint), self.default_ttl)
+
+    def get(self, endpoint, params=None):
+        """Returns (hit, value)"""
+        key = self.make_key(endpoint, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[2]
+
+    def version(self, endpoint, params=None):
+        """Generation at which the fresh entry for endpoint+params was stored, or None.
+
+        Doesn't count as a lookup. A changed version means the cached value was
+        refreshed, so anything derived from it should be rebuilt.
+        """
+        key = self.make_key(endpoint, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                return None
+            return self._versions.get(key)
+
+    def set(self, endpoint, params, value):
+        ttl = self.ttl_for(endpoint)
+        if ttl <= 0:
+            return
+        key = self.make_key(endpoint, params)
+        size = len(json.dumps(value, default=str)) if self.max_bytes else 0
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.time() + ttl, size, value, endpoint, dict(params or {}))
+            self.generation += 1
+            self._versions[key] = self.generation
+            self._total_bytes += size
+            self._evict()
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._versions.pop(key, None)
+        self._total_bytes -= entry[1]
+
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes and self._total_bytes > self.max_bytes)
+        ):
+            key = next(iter(self._entries))
+            self._drop(key)
+            self.evictions += 1
+
+    def invalidate(self, endpoint=None, restaurant_unit_id=None):
+        """Drop entries for an endpoint family (e.g. "products" or "priceHistory") and/or unit"""
+        family = _endpoint_family(endpoint) if endpoint else None
+        with self._lock:
+            doomed = [
+                key for key, (_, _, _, entry_endpoint, params) in self._entries.items()
+                if (family is None or _endpoint_family(entry_endpoint) == family)
+                and (restaurant_unit_id is None or str(params.get("restaurantUnitId")) == str(restaurant_unit_id))
+            ]
+            for key in doomed:
+                self._drop(key)
+        return len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def save(self, path=None):
+        path = path or self.persist_path
+        if not path:
+            return
+        now = time.time()
+        with self._lock:
+            rows = [
+                [expires_at, endpoint, params, value]
+                for expires_at, _, value, endpoint, params in self._entries.values()
+                if expires_at > now
+            ]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(rows, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path=None):
+        path = path or self.persist_path
+        with open(path, 'r') as f:
+            rows = json.load(f)
+        now = time.time()
+        with self._lock:
+            for expires_at, endpoint, params, value in rows:
+                if expires_at <= now:
+                    continue
+                size = len(json.dumps(value, default=str)) if self.max_bytes else 0
+                key = self.make_key(endpoint, params)
+                self._entries[key] = (expires_at, size, value, endpoint, params)
+                self.generation += 1
+                self._versions[key] = self.generation
+                self._total_bytes += size
+            self._evict()
+
+def _endpoint_family(endpoint):
+    """products/123/priceHistory -> priceHistory, orders/42 -> orders/{id}, vendors -> vendors"""
+    parts = endpoint.split('/')
+    if len(parts) == 1:
+        return endpoint
+    if parts[-1] == "priceHistory":
+        return "priceHistory"
+    return f"{parts[0]}/{{id}}"
@@ -0,0 +1,332 @@
+"""Compact columnar snapshot format (.mesnap).
+
+Layout: an 8-byte magic, a little-endian uint64 header length, a JSON header, then
+8-byte aligned column blocks. Every list of records in the snapshot (e.g.
+data["orders"]["orders"]) becomes a table; nested record lists such as lineItems
+become child tables addressed by an offsets column. Numeric columns and
+dictionary codes for string columns are stored raw, so the reader maps them
+straight out of the file with mmap; string dictionaries and irregular values are
+zlib-compressed JSON.
+
+    write_snapshot(data, "restaurant_data.mesnap")
+    data = read_snapshot("restaurant_data.mesnap")        # same dicts as json.load
+    with SnapshotReader("restaurant_data.mesnap") as reader:
+        orders = reader.table("orders/orders")           # columnar access, no dicts
+        totals = orders.array("orderTotal")
+
+Convert an existing JSON dump with:  python snapshot_format.py restaurant_data.json
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+import numpy as np
+
+MAGIC = b"MESNAP01"
+SUFFIX = ".mesnap"
+_TABLE_MARKER = "__mesnap_table__"
+_MISSING = object()
+_INT64_MIN, _INT64_MAX = -(2 ** 63), 2 ** 63 - 1
+
+def is_binary_snapshot(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def _is_records(value):
+    return isinstance(value, list) and bool(value) and all(isinstance(v, dict) for v in value)
+
+class _Writer:
+    def __init__(self, level):
+        self.level = level
+        self.blocks = []
+        self.size = 0
+
+    def _add(self, payload, **desc):
+        padding = (-self.size) % 8
+        if padding:
+            self.blocks.append(b"\0" * padding)
+            self.size += padding
+        desc["offset"] = self.size
+        desc["length"] = len(payload)
+        self.blocks.append(payload)
+        self.size += len(payload)
+        return desc
+
+    def raw(self, array):
+        array = np.ascontiguousarray(array)
+        return self._add(array.tobytes(), codec="raw", dtype=array.dtype.str, count=int(array.size))
+
+    def compressed(self, value):
+        payload = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), self.level)
+        return self._add(payload, codec="zlib")
+
+    def bits(self, flags):
+        return dict(self.raw(np.packbits(np.asarray(flags, dtype=bool))), bits=len(flags))
+
+    def table(self, records):
+        keys = {}
+        for record in records:
+            for key in record:
+                keys.setdefault(key, None)
+        return {
+            "rows": len(records),
+            "columns": {key: self.column([r.get(key, _MISSING) for r in records]) for key in keys}
+        }
+
+    def column(self, values):
+        spec = {}
+        present = [v is not _MISSING for v in values]
+        if not all(present):
+            spec["present"] = self.bits(present)
+        vals = [v for v in values if v is not _MISSING]
+
+        if all(isinstance(v, bool) for v in vals):
+            spec["kind"] = "bool"
+            spec["data"] = self.raw(np.array([v is True for v in values], dtype=np.uint8))
+        elif all(type(v) is int and _INT64_MIN <= v <= _INT64_MAX for v in vals):
+            spec["kind"] = "int"
+            spec["data"] = self.raw(np.array([v if p else 0 for v, p in zip(values, present)], dtype=np.int64))
+        elif all(type(v) is float or type(v) is int and _INT64_MIN <= v <= _INT64_MAX for v in vals):
+            # Ints too big for int64 would lose precision as float64; those fall through to json
+            spec["kind"] = "num"
+            spec["data"] = self.raw(np.array([float(v) if p else 0.0 for v, p in zip(values, present)], dtype=np.float64))
+            is_int = [type(v) is int for v in values]
+            if any(is_int):
+                spec["ints"] = self.bits(is_int)
+        elif all(v is None or isinstance(v, str) for v in vals):
+            spec["kind"] = "str"
+            dictionary = {}
+            codes = np.array([
+                dictionary.setdefault(v, len(dictionary)) if isinstance(v, str) else -1
+                for v in values
+            ], dtype=np.int32)
+            spec["data"] = self.raw(codes)
+            spec["dictionary"] = self.compressed(list(dictionary))
+        elif any(_is_records(v) for v in vals) and all(v is None or isinstance(v, list) and all(isinstance(x, dict) for x in v) for v in vals):
+            spec["kind"] = "table"
+            lists = [v if isinstance(v, list) else [] for v in values]
+            spec["offsets"] = self.raw(np.cumsum([0] + [len(v) for v in lists], dtype=np.int64))
+            nulls = [v is None for v in values]
+            if any(nulls):
+                spec["nulls"] = self.bits(nulls)
+            spec["table"] = self.table([r for v in lists for r in v])
+        else:
+            spec["kind"] = "json"
+            spec["data"] = self.compressed([v if p else None for v, p in zip(values, present)])
+        return spec
+
+def write_snapshot(data, path, level=6):
+    """Write a snapshot dict (restaurant_data.json or crawler layout) in .mesnap format"""
+    writer = _Writer(level)
+    tables = {}
+
+    def extract(value, name):
+        if _is_records(value):
+            tables[name] = writer.table(value)
+            return {_TABLE_MARKER: name}
+        return value
+
+    if isinstance(data, dict):
+        meta = {}
+        for key, value in data.items():
+            if isinstance(value, dict):
+                meta[key] = {k: extract(v, f"{key}/{k}") for k, v in value.items()}
+            else:
+                meta[key] = extract(value, key)
+    else:
+        meta = extract(data, "")
+
+    header = json.dumps({"version": 1, "meta": meta, "tables": tables}, separators=(",", ":")).encode("utf-8")
+    preamble = MAGIC + struct.pack("<Q", len(header)) + header
+    preamble += b"\0" * ((-len(preamble)) % 8)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(preamble)
+        for block in writer.blocks:
+            f.write(block)
+    os.replace(tmp_path, path)
+
+class SnapshotReader:
+    """Memory-mapped reader for .mesnap files"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap refuses empty files
+            self._file.close()
+            raise ValueError(f"{path} is not a .mesnap snapshot")
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a .mesnap snapshot")
+        (header_length,) = struct.unpack_from("<Q", self._mm, len(MAGIC))
+        start = len(MAGIC) + 8
+        self.header = json.loads(self._mm[start:start + header_length].decode("utf-8"))
+        self._base = start + header_length + ((-(start + header_length)) % 8)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        try:
+            self._mm.close()
+        except BufferError:
+            # Arrays handed out still map the file; it is released when they are
+            pass
+        self._file.close()
+
+    def tables(self):
+        return list(self.header["tables"])
+
+    def table(self, name):
+        return TableView(self, self.header["tables"][name])
+
+    def _raw(self, desc):
+        return np.frombuffer(self._mm, dtype=np.dtype(desc["dtype"]), count=desc["count"], offset=self._base + desc["offset"])
+
+    def _compressed(self, desc):
+        start = self._base + desc["offset"]
+        return json.loads(zlib.decompress(self._mm[start:start + desc["length"]]))
+
+    def _bits(self, desc):
+        return np.unpackbits(self._raw(desc), count=desc["bits"]).astype(bool)
+
+    def to_dict(self):
+        """Rebuild the original snapshot structure"""
+        def is_marker(value):
+            return (isinstance(value, dict) and set(value) == {_TABLE_MARKER}
+                    and value[_TABLE_MARKER] in self.header["tables"])
+
+        def restore(value):
+            if is_marker(value):
+                return self.table(value[_TABLE_MARKER]).to_records()
+            return value
+
+        meta = self.header["meta"]
+        if not isinstance(meta, dict) or is_marker(meta):
+            return restore(meta)
+        return {
+            key: {k: restore(v) for k, v in value.items()} if isinstance(value, dict) and not is_marker(value) else restore(value)
+            for key, value in meta.items()
+        }
+
+class TableView:
+    """Columnar access to one table of a .mesnap file"""
+
+    def __init__(self, reader, spec):
+        self.reader = reader
+        self.spec = spec
+        self.rows = spec["rows"]
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def columns(self):
+        return list(self.spec["columns"])
+
+    def kind(self, name):
+        return self.spec["columns"][name]["kind"]
+
+    def present(self, name):
+        spec = self.spec["columns"].get(name)
+        if spec is None:
+            return np.zeros(self.rows, dtype=bool)
+        if "present" not in spec:
+            return np.ones(self.rows, dtype=bool)
+        return self.reader._bits(spec["present"])
+
+    def array(self, name):
+        """Numeric or bool column as a (memory-mapped) NumPy array"""
+        spec = self.spec["columns"][name]
+        if spec["kind"] not in ("int", "num", "bool"):
+            raise TypeError(f"Column {name} is {spec['kind']}, not numeric")
+        return self.reader._raw(spec["data"])
+
+    def strings(self, name):
+        """String column as (codes, dictionary); code -1 means None or missing"""
+        spec = self.spec["columns"][name]
+        if spec["kind"] != "str":
+            raise TypeError(f"Column {name} is {spec['kind']}, not str")
+        return self.reader._raw(spec["data"]), self.reader._compressed(spec["dictionary"])
+
+    def child(self, name):
+        """Nested record column as (offsets, TableView): row i owns child rows offsets[i]:offsets[i+1]"""
+        spec = self.spec["columns"][name]
+        if spec["kind"] != "table":
+            raise TypeError(f"Column {name} is {spec['kind']}, not a nested table")
+        return self.reader._raw(spec["offsets"]), TableView(self.reader, spec["table"])
+
+    def values(self, name):
+        """Any column decoded to a plain Python list (missing entries come back as None)"""
+        spec = self.spec["columns"][name]
+        kind = spec["kind"]
+        if kind == "bool":
+            return self.reader._raw(spec["data"]).astype(bool).tolist()
+        if kind == "int":
+            return self.reader._raw(spec["data"]).tolist()
+        if kind == "num":
+            floats = self.reader._raw(spec["data"]).tolist()
+            if "ints" not in spec:
+                return floats
+            ints = self.reader._bits(spec["ints"]).tolist()
+            return [int(v) if is_int else v for v, is_int in zip(floats, ints)]
+        if kind == "str":
+            codes, dictionary = self.strings(name)
+            lookup = np.array(dictionary + [None], dtype=object)
+            return lookup[codes].tolist()
+        if kind == "table":
+            offsets, child = self.child(name)
+            records = child.to_records()
+            bounds = offsets.tolist()
+            lists = [records[bounds[i]:bounds[i + 1]] for i in range(self.rows)]
+            if "nulls" in spec:
+                nulls = self.reader._bits(spec["nulls"]).tolist()
+                lists = [None if null else v for v, null in zip(lists, nulls)]
+            return lists
+        return self.reader._compressed(spec["data"])
+
+    def to_records(self):
+        keys = self.columns
+        if not keys:
+            return [{} for _ in range(self.rows)]
+        records = [dict(zip(keys, row)) for row in zip(*(self.values(key) for key in keys))]
+        for key in keys:
+            if "present" in self.spec["columns"][key]:
+                for record, present in zip(records, self.present(key).tolist()):
+                    if not present:
+                        del record[key]
+        return records
+
+def read_snapshot(path):
+    """Load a .mesnap file back into the same structure json.load gives for the original"""
+    with SnapshotReader(path) as reader:
+        return reader.to_dict()
+
+def convert_json(json_path, out_path=None, level=6):
+    out_path = out_path or os.path.splitext(json_path)[0] + SUFFIX
+    with open(json_path, 'r') as f:
+        write_snapshot(json.load(f), out_path, level)
+    return out_path
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python snapshot_format.py <snapshot.json> [output.mesnap]")
+        sys.exit(1)
+    json_path = sys.argv[1]
+    out_path = convert_json(json_path, sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"{json_path} ({os.path.getsize(json_path):,} bytes) -> {out_path} ({os.path.getsize(out_path):,} bytes)")
+
+if __name__ == "__main__":
+    main()
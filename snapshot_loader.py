@@ -0,0 +1,231 @@
+import json
+import os
+import re
+import threading
+from json.decoder import scanstring
+from snapshot_format import SUFFIX, SnapshotReader, is_binary_snapshot, read_snapshot
+
+DEFAULT_SNAPSHOT = 'restaurant_data.json'
+
+_cache = {}
+_lock = threading.Lock()
+
+def snapshot_source(path=DEFAULT_SNAPSHOT, columnar=False):
+    """The file actually read for `path`.
+
+    Rebuilding dicts from .mesnap columns is slower than json.load, so record
+    consumers read the JSON and only get the .mesnap sibling when the JSON is
+    gone. Columnar consumers (columnar=True) get the sibling whenever it is at
+    least as new.
+    """
+    binary = os.path.splitext(path)[0] + SUFFIX
+    if binary == path:
+        return path
+    try:
+        binary_mtime = os.stat(binary).st_mtime_ns
+    except FileNotFoundError:
+        return path
+    try:
+        path_mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return binary
+    return binary if columnar and binary_mtime >= path_mtime else path
+
+def load_snapshot(path=DEFAULT_SNAPSHOT):
+    """Parse a snapshot once and memoize it until the file's mtime or size changes.
+
+    Reads the .mesnap sibling only when the JSON is missing. Every caller gets
+    the same dict back, so treat it as read-only.
+    """
+    source = snapshot_source(path)
+    entry = _entry(source)
+    with entry["lock"]:
+        if "data" not in entry:
+            if is_binary_snapshot(source):
+                entry["data"] = read_snapshot(source)
+            else:
+                with open(source, 'r') as f:
+                    entry["data"] = json.load(f)
+        return entry["data"]
+
+def derived(path, name, build, columnar=False):
+    """Memoize build() alongside a snapshot, dropped whenever the file it reads changes"""
+    entry = _entry(snapshot_source(path, columnar))
+    with entry["lock"]:
+        if name not in entry["derived"]:
+            entry["derived"][name] = build()
+        return entry["derived"][name]
+
+def invalidate(path=None):
+    with _lock:
+        if path is None:
+            _cache.clear()
+        else:
+            _cache.pop(os.path.abspath(path), None)
+            _cache.pop(os.path.abspath(os.path.splitext(path)[0] + SUFFIX), None)
+
+def _entry(path):
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    key = os.path.abspath(path)
+    with _lock:
+        entry = _cache.get(key)
+        if entry is None or entry["signature"] != signature:
+            entry = _cache[key] = {"signature": signature, "derived": {}, "lock": threading.RLock()}
+        return entry
+
+def iter_records(path, entity, chunk_size=1 << 16):
+    """Stream the records of data[entity][entity] (or data[entity] if it is a list).
+
+    Only one record is materialized at a time, and values we don't need (e.g. the
+    product list when reading orders) are skipped without being parsed, so memory
+    stays bounded by the largest single record. Without the JSON, the .mesnap
+    sibling is decoded a whole table at a time.
+    """
+    source = snapshot_source(path)
+    if is_binary_snapshot(source):
+        with SnapshotReader(source) as reader:
+            for name in (f"{entity}/{entity}", entity):
+                if name in reader.header["tables"]:
+                    yield from reader.table(name).to_records()
+                    return
+        return
+    with open(source, 'r') as f:
+        reader = _StreamReader(f, chunk_size)
+        if reader.next_char() != '{' or not reader.find_key(entity):
+            return
+        char = reader.peek()
+        if char == '{':
+            reader.next_char()
+            if not reader.find_key(entity) or reader.peek() != '[':
+                return
+        elif char != '[':
+            return
+        yield from reader.iter_array()
+
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_SCALAR_END = re.compile(r'[,\]}\s]')
+
+class _StreamReader:
+    """Just enough of an incremental JSON scanner to walk objects and stream arrays"""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """Drop what has been consumed and read another chunk; False at end of file"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        if not chunk:
+            self.eof = True
+            return False
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of snapshot")
+
+    def next_char(self):
+        char = self.peek()
+        self.pos += 1
+        return char
+
+    def read_string(self):
+        """Read a string whose opening quote is at self.pos"""
+        while True:
+            try:
+                value, end = scanstring(self.buf, self.pos + 1)
+                self.pos = end
+                return value
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+
+    def read_value(self):
+        if self.peek() not in '"[{':
+            # Numbers and literals have no closing bracket, so make sure the whole
+            # token is buffered before decoding ("1" may really be "1.5e3")
+            while not _SCALAR_END.search(self.buf, self.pos) and self._fill():
+                pass
+        decoder = json.JSONDecoder()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Most likely the value runs past the buffer; anything else fails at EOF
+                if not self._fill():
+                    raise
+                continue
+            self.pos = end
+            return value
+
+    def skip_value(self):
+        char = self.peek()
+        if char == '"':
+            self.read_string()
+            return
+        if char not in '[{':
+            self.read_value()
+            return
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self._fill():
+                    raise ValueError("Unexpected end of snapshot")
+                continue
+            self.pos = match.start()
+            token = match.group()
+            if token == '"':
+                self.read_string()
+                continue
+            self.pos += 1
+            depth += 1 if token in '[{' else -1
+            if depth == 0:
+                return
+
+    def find_key(self, key):
+        """Inside an object (just past '{'): advance to the value of `key`, or to past '}'"""
+        if self.peek() == '}':
+            self.pos += 1
+            return False
+        while True:
+            if self.peek() != '"':
+                raise ValueError("Malformed snapshot: expected an object key")
+            name = self.read_string()
+            if self.next_char() != ':':
+                raise ValueError("Malformed snapshot: expected ':'")
+            if name == key:
+                return True
+            self.skip_value()
+            char = self.next_char()
+            if char == '}':
+                return False
+            if char != ',':
+                raise ValueError("Malformed snapshot: expected ',' or '}'")
+
+    def iter_array(self):
+        self.next_char()
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.read_value()
+            char = self.next_char()
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError("Malformed snapshot: expected ',' or ']'")
@@ -0,0 +1,173 @@
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_FILE = 'sync_state.json'
+
+class SyncEngine:
+    """Incremental refresh of a restaurant_data.json-style snapshot.
+
+    Watermarks are kept per restaurant unit and entity in a small JSON state file:
+    the newest invoice date seen, a fingerprint per known order, and which orders
+    were still open. Each run lists orders from just before the watermark (or from
+    the oldest still-open order), fetches details only for orders that are new or
+    whose header changed, and merges them into the snapshot.
+    """
+
+    def __init__(self, client, state_path=DEFAULT_STATE_FILE, lookback_days=90, overlap_days=2, store=None):
+        self.client = client
+        self.state_path = state_path
+        self.lookback_days = lookback_days
+        self.overlap_days = overlap_days
+        self.store = store
+        self.state = self._load_state()
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, 'r') as f:
+            return json.load(f)
+
+    def _save_state(self):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def watermarks(self, restaurant_unit_id):
+        return self.state.setdefault(str(restaurant_unit_id), {})
+
+    def sync(self, restaurant_unit_id, snapshot=None):
+        """Bring `snapshot` up to date for one unit; returns (snapshot, report)"""
+        snapshot = snapshot or {}
+        unit_state = self.watermarks(restaurant_unit_id)
+        report = {"restaurant_unit_id": restaurant_unit_id, "started_at": datetime.now().isoformat()}
+        # A sync must see the live API, not whatever the client cached earlier
+        if hasattr(self.client, "invalidate_cache"):
+            self.client.invalidate_cache(restaurant_unit_id=restaurant_unit_id)
+
+        self._sync_catalog(restaurant_unit_id, snapshot, unit_state, report)
+        self._sync_orders(restaurant_unit_id, snapshot, unit_state, report)
+
+        report["finished_at"] = datetime.now().isoformat()
+        unit_state["last_sync"] = report["finished_at"]
+        self._save_state()
+        return snapshot, report
+
+    def _sync_catalog(self, restaurant_unit_id, snapshot, unit_state, report):
+        # The API has no change feed for the catalog, but it is a handful of pages
+        fetchers = {
+            "categories": self.client.get_categories,
+            "products": self.client.get_products,
+            "vendors": self.client.get_vendors,
+        }
+        for entity, fetch in fetchers.items():
+            records = fetch(restaurant_unit_id)
+            snapshot[entity] = {entity: records}
+            unit_state[entity] = {"count": len(records), "synced_at": datetime.now().isoformat()}
+            report[entity] = len(records)
+            if self.store is not None:
+                getattr(self.store, f"upsert_{entity}")(restaurant_unit_id, records)
+
+    def _sync_orders(self, restaurant_unit_id, snapshot, unit_state, report):
+        order_state = unit_state.setdefault("orders", {})
+        existing = {str(o["orderId"]): o for o in snapshot.get("orders", {}).get("orders", [])}
+        # Only trust fingerprints for orders the snapshot actually still holds
+        known = {
+            order_id: fingerprint
+            for order_id, fingerprint in order_state.get("fingerprints", {}).items()
+            if order_id in existing and "lineItems" in existing[order_id]
+        }
+
+        end_date = datetime.now().date()
+        start_date = self._orders_start_date(order_state, known, end_date)
+        listed = self.client.get_orders(restaurant_unit_id, start_date.isoformat(), end_date.isoformat())
+
+        to_fetch = {}
+        new_orders = changed_orders = 0
+        for order in listed:
+            order_id = str(order["orderId"])
+            fingerprint = _order_fingerprint(order)
+            if order_id not in known:
+                new_orders += 1
+            elif known[order_id] != fingerprint:
+                changed_orders += 1
+                # A closed order's detail may be cached; it is stale now
+                if hasattr(self.client, "invalidate_order_detail"):
+                    self.client.invalidate_order_detail(restaurant_unit_id, order_id)
+            else:
+                continue
+            to_fetch[order_id] = order
+
+        failed = []
+        for order_id, detail in self.client.get_order_details(restaurant_unit_id, to_fetch.keys(), return_exceptions=True):
+            if isinstance(detail, Exception):
+                logger.warning("Could not fetch order %s: %s", order_id, detail)
+                failed.append(order_id)
+                continue
+            merged = dict(to_fetch[order_id], **detail)
+            existing[order_id] = merged
+            known[order_id] = _order_fingerprint(to_fetch[order_id])
+
+        orders = sorted(existing.values(), key=lambda o: o.get("invoiceDate") or "")
+        snapshot["orders"] = {"orders": orders}
+        if self.store is not None:
+            if not self.store.count_orders(restaurant_unit_id):
+                # A new store starts from everything the snapshot already holds
+                self.store.upsert_orders(restaurant_unit_id, orders)
+            else:
+                self.store.upsert_orders(restaurant_unit_id, [existing[order_id] for order_id in to_fetch if order_id not in failed])
+            stored_from = min([start_date.isoformat()] + [o["invoiceDate"][:10] for o in orders if o.get("invoiceDate")])
+            self.store.record_sync(restaurant_unit_id, stored_from)
+
+        invoice_dates = [o["invoiceDate"] for o in orders if o.get("invoiceDate") and str(o["orderId"]) in known]
+        order_state["fingerprints"] = known
+        order_state["last_invoice_date"] = max(invoice_dates) if invoice_dates else None
+        order_state["open_orders"] = {
+            str(o["orderId"]): o.get("invoiceDate")
+            for o in orders
+            if str(o["orderId"]) in known and o.get("status") != "CLOSED"
+        }
+
+        report.update({
+            "orders_window": [start_date.isoformat(), end_date.isoformat()],
+            "orders_listed": len(listed),
+            "new_orders": new_orders,
+            "changed_orders": changed_orders,
+            "details_fetched": len(to_fetch) - len(failed),
+            "details_skipped": len(listed) - len(to_fetch),
+            "details_failed": failed,
+            "orders_total": len(orders),
+        })
+
+    def _orders_start_date(self, order_state, known, end_date):
+        last_invoice_date = order_state.get("last_invoice_date")
+        if not known or not last_invoice_date:
+            return end_date - timedelta(days=self.lookback_days)
+        start_date = _to_date(last_invoice_date) - timedelta(days=self.overlap_days)
+        # Orders that were still open can change later, so keep them in the window
+        open_dates = [_to_date(d) for d in order_state.get("open_orders", {}).values() if d]
+        if open_dates:
+            start_date = min(start_date, min(open_dates))
+        return start_date
+
+def format_report(report):
+    return (
+        f"Synced unit {report['restaurant_unit_id']}: "
+        f"{report.get('products', 0)} products, {report.get('vendors', 0)} vendors, "
+        f"{report.get('categories', 0)} categories; "
+        f"orders {report['orders_window'][0]}..{report['orders_window'][1]}: "
+        f"{report['orders_listed']} listed, {report['details_fetched']} details fetched "
+        f"({report['new_orders']} new, {report['changed_orders']} changed), "
+        f"{report['details_skipped']} skipped, {len(report['details_failed'])} failed"
+    )
+
+def _order_fingerprint(order):
+    """Header fields that change when an order is edited or closed"""
+    return f"{order.get('status')}|{order.get('orderTotal')}|{order.get('invoiceDate')}"
+
+def _to_date(value):
+    return datetime.fromisoformat(str(value)[:10]).date()
@@ -0,0 +1,95 @@
+import logging
+import os
+from response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+# Seconds a tool's result stays fresh; tools not listed are never cached.
+# Catalog and price-history answers follow the client's product TTLs, order-based
+# answers the much shorter orders TTL.
+TOOL_TTLS = {
+    "search_products": 3600,
+    "get_product_details": 3600,
+    "get_product_price_history": 3600,
+    "analyze_price_trends": 3600,
+    "get_vendor_purchases": 300,
+    "get_top_vendors_by_spend": 300,
+    "get_product_price_changes": 300,
+    "evaluate_vendor_performance": 300,
+}
+
+# Defaults call_function fills in, so {} and {"limit": 5} share an entry
+TOOL_DEFAULTS = {
+    "get_top_vendors_by_spend": {"limit": 5},
+    "get_product_price_changes": {"days": 5},
+    "analyze_price_trends": {"days": 30},
+}
+
+# Arguments the helpers match case-insensitively (they lower() and strip() them)
+_CASE_INSENSITIVE = {"query", "product_name"}
+
+def normalize_args(function_name, function_args):
+    args = dict(TOOL_DEFAULTS.get(function_name, {}), **(function_args or {}))
+    for key, value in args.items():
+        if key in _CASE_INSENSITIVE and isinstance(value, str):
+            args[key] = value.lower().strip()
+        elif isinstance(value, float) and value.is_integer():
+            args[key] = int(value)
+    return args
+
+def _is_error(result):
+    if isinstance(result, dict):
+        return "error" in result
+    return isinstance(result, str) and result.startswith(("Error", "Unable"))
+
+class ToolResultCache(ResponseCache):
+    """TTL + LRU cache of call_function results, keyed by tool name plus normalized arguments.
+
+    Everything is dropped when the MarginEdge client's cache is invalidated (a sync
+    in this process, see attach()) or when one of `watch_paths` changes, e.g. the
+    sync state file written by explore_marginedge_data in another process.
+    Errors are never cached.
+    """
+
+    def __init__(self, ttls=None, max_entries=500, watch_paths=(), persist_path=None):
+        super().__init__(dict(TOOL_TTLS, **(ttls or {})), default_ttl=0, max_entries=max_entries, persist_path=persist_path)
+        self.watch_paths = list(watch_paths)
+        self._watch_signature = self._signature()
+
+    def attach(self, client):
+        """Invalidate alongside `client`'s response cache"""
+        client.invalidation_listeners.append(lambda endpoint, restaurant_unit_id: self.clear())
+        return self
+
+    def _signature(self):
+        signature = []
+        for path in self.watch_paths:
+            try:
+                signature.append(os.stat(path).st_mtime_ns)
+            except FileNotFoundError:
+                signature.append(None)
+        return signature
+
+    def _check_watched(self):
+        signature = self._signature()
+        if signature != self._watch_signature:
+            self._watch_signature = signature
+            self.clear()
+            logger.info("Tool cache cleared: synced data changed")
+
+    def call(self, call_function, function_name, function_args):
+        """call_function(function_name, function_args), served from cache when fresh"""
+        if self.ttl_for(function_name) <= 0:
+            return call_function(function_name, function_args)
+        key_args = normalize_args(function_name, function_args)
+        self._check_watched()
+        hit, value = self.get(function_name, key_args)
+        stats = self.stats()
+        logger.info("Tool cache %s for %s (hit rate %.0f%% over %d lookups)",
+                    "hit" if hit else "miss", function_name, stats["hit_rate"] * 100, stats["hits"] + stats["misses"])
+        if hit:
+            return value
+        result = call_function(function_name, function_args)
+        if not _is_error(result):
+            self.set(function_name, key_args, result)
+        return result
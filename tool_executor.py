@@ -0,0 +1,78 @@
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+def tool_specs(function_descriptions):
+    """Wrap legacy `functions` descriptions in the `tools` format, which allows parallel calls"""
+    return [{"type": "function", "function": description} for description in function_descriptions]
+
+def tool_calls(message):
+    """(call_id, name, arguments) for every tool the model asked for.
+
+    Handles both `tool_calls` and the legacy single `function_call` (call_id None).
+    """
+    calls = [
+        (call["id"], call["function"]["name"], call["function"].get("arguments") or "{}")
+        for call in message.get("tool_calls") or []
+        if call.get("type", "function") == "function"
+    ]
+    if not calls and message.get("function_call"):
+        call = message["function_call"]
+        calls.append((None, call["name"], call.get("arguments") or "{}"))
+    return calls
+
+def tool_message(call_id, name, content):
+    """The message answering one tool call"""
+    if call_id is None:
+        return {"role": "function", "name": name, "content": content}
+    return {"role": "tool", "tool_call_id": call_id, "content": content}
+
+class ToolExecutor:
+    """Runs a turn's tool calls concurrently on a shared worker pool.
+
+    Every call in a batch gets `timeout` seconds from the moment the batch is
+    submitted, so a turn takes as long as its slowest tool, capped at `timeout`.
+    A tool that fails or overruns yields an {"error": ...} result for the model
+    instead of failing the turn; an overrunning call finishes in the background.
+    """
+
+    def __init__(self, call_function, max_workers=4, timeout=30):
+        self.call_function = call_function
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    def _run_one(self, name, arguments):
+        start = time.perf_counter()
+        try:
+            args = json.loads(arguments) if isinstance(arguments, str) else dict(arguments)
+        except ValueError as e:
+            return {"error": f"Invalid arguments for {name}: {e}"}
+        try:
+            return self.call_function(name, args)
+        finally:
+            logger.info("Tool %s(%s) took %.2fs", name, arguments, time.perf_counter() - start)
+
+    def run(self, calls):
+        """Execute (call_id, name, arguments) calls; returns (call_id, name, result) in call order"""
+        deadline = time.monotonic() + self.timeout
+        futures = [(call_id, name, self._executor.submit(self._run_one, name, arguments))
+                   for call_id, name, arguments in calls]
+        results = []
+        for call_id, name, future in futures:
+            try:
+                result = future.result(timeout=max(0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                future.cancel()
+                logger.warning("Tool %s timed out after %ss", name, self.timeout)
+                result = {"error": f"{name} timed out after {self.timeout} seconds"}
+            except Exception as e:
+                logger.error("Tool %s failed: %s", name, e)
+                result = {"error": f"{name} failed: {str(e)}"}
+            results.append((call_id, name, result))
+        return results
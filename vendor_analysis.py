@@ -1,32 +1,16 @@
-import json
-from collections import defaultdict
+from line_item_table import load_table
+from snapshot_loader import DEFAULT_SNAPSHOT, load_snapshot
 
-def load_data(file_path='restaurant_data.json'):
-    with open(file_path, 'r') as f:
-        return json.load(f)
+def load_data(file_path=DEFAULT_SNAPSHOT):
+    return load_snapshot(file_path)
 
-def get_vendor_purchases(vendor_name):
-    data = load_data()
-    vendor_purchases = defaultdict(float)
-    
-    for order in data.get('orders', {}).get('orders', []):
-        if order.get('vendorName', '').lower() == vendor_name.lower():
-            for item in order.get('lineItems', []):
-                product_name = item.get('vendorItemName', 'Unknown Product')
-                quantity = item.get('quantity', 0)
-                unit_price = item.get('unitPrice', 0)
-                vendor_purchases[product_name] += quantity * unit_price
-    
-    return dict(vendor_purchases)
+def get_vendor_purchases(vendor_name, file_path=DEFAULT_SNAPSHOT):
+    table = load_table(file_path)
+    return table.spend_by_product(table.vendor_mask(vendor_name), by_item_name=True)
 
-def get_top_vendors_by_spend(limit=5):
-    data = load_data()
-    vendor_spend = defaultdict(float)
-    
-    for order in data.get('orders', {}).get('orders', []):
-        vendor_name = order.get('vendorName', 'Unknown Vendor')
-        order_total = float(order.get('orderTotal', 0))
-        vendor_spend[vendor_name] += order_total
+def get_top_vendors_by_spend(limit=5, file_path=DEFAULT_SNAPSHOT):
+    table = load_table(file_path)
+    vendor_spend = table.order_totals_by_vendor()
     
     sorted_vendors = sorted(vendor_spend.items(), key=lambda x: x[1], reverse=True)
     return sorted_vendors[:limit]